@@ -1,6 +1,18 @@
-__all__ = ["Client", "Video", "Pornstar", "sorting",
-           "errors", "consts"]
+__all__ = ["Client", "Video", "Pornstar", "SharedTransport", "ResiliencePolicy", "ProxyPool", "LocalIndex",
+           "HttpArchive", "RecordingCore", "ReplayCore", "DownloadStore",
+           "AdaptiveDownloader", "ListingAnalytics", "HostRateLimiter", "PostProcessor",
+           "sorting", "errors", "consts"]
 
 
 from xvideos_api.xvideos_api import Client, Video, Pornstar
-from xvideos_api.modules import sorting, errors, consts
\ No newline at end of file
+from xvideos_api.modules import sorting, errors, consts
+from xvideos_api.modules.transport import SharedTransport
+from xvideos_api.modules.resilience import ResiliencePolicy, RetryPolicy, RetryBudget, CircuitBreaker
+from xvideos_api.modules.proxy_pool import ProxyPool
+from xvideos_api.modules.local_index import LocalIndex
+from xvideos_api.modules.replay import HttpArchive, RecordingCore, ReplayCore
+from xvideos_api.modules.download_store import DownloadStore
+from xvideos_api.modules.adaptive import AdaptiveDownloader, AdaptiveDownloadReport, QualityDecision
+from xvideos_api.modules.analytics import ListingAnalytics, TopK, QuantileSketch, merge_snapshots
+from xvideos_api.modules.rate_limit import HostRateLimiter
+from xvideos_api.modules.postprocess import PostProcessor, PostProcessResult
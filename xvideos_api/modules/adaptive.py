@@ -0,0 +1,305 @@
+"""
+Throughput-aware HLS downloads.
+
+AdaptiveDownloader measures the segment throughput while it downloads and switches to a lower variant for the
+remaining segments when the download would miss `target_time`. With `initial_throughput` (bytes per second, e.g. from
+the last run) the first variant is already picked from the playlist bandwidths so that it fits the target.
+
+Variants are switched at segment borders, aligned by media time. The result is one MPEG-TS stream whose resolution
+changes at the switch points (the same thing an HLS player does), every decision is listed in the report. A segment
+that still fails after the retries of the core is fetched again and then taken from a lower variant, so one bad
+segment doesn't cost the whole download.
+
+    report = await video.download_adaptive(path="./", target_time=120)
+    for decision in report.decisions:
+        print(decision.segment, decision.from_height, "->", decision.to_height, decision.reason)
+"""
+import os
+import time
+import asyncio
+import logging
+
+from collections import deque
+from urllib.parse import urljoin
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List
+
+import m3u8
+
+from base_api.base import BaseCore, setup_logger
+from base_api.modules.type_hints import DownloadReport
+from base_api.modules.static_functions import collect_variants, normalize_quality_value, pick_by_height, pick_by_label
+
+
+@dataclass
+class QualityDecision:
+    elapsed: float # Seconds since the download started
+    segment: int # Index of the first segment (in media order) fetched with the new variant
+    from_height: int | None
+    to_height: int | None
+    throughput: float | None # Measured bytes per second, None if not measured yet
+    projected: float | None # Projected total download time with the old variant
+    reason: str # "initial", "initial_estimate", "downgrade" or "fallback" (one failed segment from a lower variant)
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+@dataclass
+class AdaptiveDownloadReport(DownloadReport):
+    decisions: List[QualityDecision] = field(default_factory=list)
+    variants: List[Dict[str, Any]] = field(default_factory=list) # height / bandwidth of every variant
+    bytes: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class _Variant:
+    height: int | None
+    bandwidth: int
+    url: str
+    segments: List[str] = field(default_factory=list)
+    starts: List[float] = field(default_factory=list) # Media time at which every segment starts
+    duration: float = 0.0
+
+
+class AdaptiveDownloader:
+    def __init__(self, core: BaseCore, target_time: float | None = None, max_quality: str | int = "best",
+                 initial_throughput: float | None = None, safety: float = 0.85, window: int = 8,
+                 min_samples: int = 4, max_workers: int | None = None, segment_retries: int = 1):
+        """
+        :param core: (BaseCore) The core that fetches playlists and segments
+        :param target_time: (float) Seconds the whole download should take at most, None never downgrades
+        :param max_quality: (str, int) Highest variant to use ("best", "half", "worst" or a height)
+        :param initial_throughput: (float) Expected bytes per second, used to pick the first variant
+        :param safety: (float) Only plan with this fraction of the measured throughput
+        :param window: (int) Segments the throughput is averaged over
+        :param min_samples: (int) Segments to measure after the start / a switch before deciding again
+        :param max_workers: (int) Segments fetched at the same time, defaults to configuration.max_workers_download
+        :param segment_retries: (int) Extra attempts for a failed segment before it is taken from a lower variant
+        """
+        self.core = core
+        self.target_time = target_time
+        self.max_quality = max_quality
+        self.initial_throughput = initial_throughput
+        self.safety = safety
+        self.window = window
+        self.min_samples = min_samples
+        self.max_workers = max_workers or core.configuration.max_workers_download
+        self.segment_retries = segment_retries
+        self.logger = setup_logger(name="XVIDEOS API - [AdaptiveDownloader]", log_file=None, level=logging.ERROR)
+
+    async def _variants(self, master_url: str) -> List[_Variant]:
+        """All variants up to max_quality, lowest first, with their media playlists resolved"""
+        content = await self.core.fetch(master_url)
+        master = m3u8.loads(content)
+        variants = collect_variants(master)
+        if not variants:
+            raise ValueError("No usable video variants found in master playlist.")
+
+        quality = normalize_quality_value(self.max_quality)
+        ceiling = pick_by_label(variants, quality) if isinstance(quality, str) else pick_by_height(variants, quality)
+        ordered = sorted(variants, key=lambda v: (v["height"] or 0, v["bandwidth"]))
+        ordered = ordered[:ordered.index(ceiling) + 1]
+
+        async def resolve(variant: Dict[str, Any]) -> _Variant:
+            url = urljoin(master_url, variant["uri"])
+            playlist = m3u8.loads(await self.core.fetch(url, save_cache=False))
+            resolved = _Variant(height=variant["height"], bandwidth=variant["bandwidth"], url=url)
+            position = 0.0
+            for segment in playlist.segments:
+                resolved.segments.append(urljoin(url, segment.uri))
+                resolved.starts.append(position)
+                position += segment.duration or 0.0
+
+            resolved.duration = position
+            return resolved
+
+        return list(await asyncio.gather(*(resolve(variant) for variant in ordered)))
+
+    def _fits(self, variant: _Variant, remaining_media: float, throughput: float, elapsed: float) -> bool:
+        remaining_bytes = variant.bandwidth / 8 * remaining_media
+        return elapsed + remaining_bytes / (throughput * self.safety) <= self.target_time
+
+    def _pick(self, variants: List[_Variant], remaining_media: float, throughput: float, elapsed: float) -> int:
+        for index in range(len(variants) - 1, -1, -1):
+            if self._fits(variants[index], remaining_media, throughput, elapsed):
+                return index
+
+        return 0 # Nothing fits, the lowest variant is the best we can do
+
+    async def _recover(self, variants: List[_Variant], owner: int, url: str, media_start: float,
+                       fetch: Callable[[str], Awaitable[bytes]]) -> tuple[int | None, bytes]:
+        """
+        Fetches a failed segment again, then the segment at the same media time from every lower variant.
+
+        :param owner: (int) Index of the variant the failed segment belongs to
+        :return: (tuple) Index of the variant the content came from and the content, (None, b"") if nothing worked
+        """
+        candidates = [(owner, url)] * self.segment_retries
+        for index in range(owner - 1, -1, -1):
+            starts = variants[index].starts
+            position = next((i for i, start in enumerate(starts) if abs(start - media_start) < 0.01), None)
+            if position is not None: # Only aligned segments, anything else would repeat or skip media
+                candidates.append((index, variants[index].segments[position]))
+
+        for index, candidate in candidates:
+            try:
+                content = await fetch(candidate)
+
+            except Exception as e:
+                self.logger.warning(f"Retry of {candidate} failed: {e}")
+                continue
+
+            if content:
+                return index, content
+
+        return None, b""
+
+    async def download(self, master_url: str, path: str, callback: Callable[[int, int], None] | None = None,
+                       remux: bool = False, callback_remux: Callable[[int, int], None] | None = None,
+                       stop_event=None) -> AdaptiveDownloadReport:
+        """
+        :param master_url: (str) The HLS master playlist
+        :param path: (str) Output file
+        :param callback: (callable) Progress callback (done, total) in segments
+        :param remux: (bool) Remux the MPEG-TS output to MP4 (needs PyAV)
+        :param callback_remux: (callable) Progress callback of the remux
+        :param stop_event: (threading.Event) Cancels the download when set
+        """
+        started = time.perf_counter()
+        variants = await self._variants(master_url)
+        current = len(variants) - 1
+        decisions: List[QualityDecision] = []
+        if self.target_time and self.initial_throughput:
+            current = self._pick(variants, variants[current].duration, self.initial_throughput, 0.0)
+            decisions.append(QualityDecision(0.0, 0, None, variants[current].height, self.initial_throughput, None,
+                                             "initial_estimate"))
+
+        else:
+            decisions.append(QualityDecision(0.0, 0, None, variants[current].height, None, None, "initial"))
+
+        total = len(variants[current].segments)
+        semaphore = asyncio.Semaphore(self.max_workers)
+        samples: deque = deque(maxlen=self.window) # (finished at, bytes)
+        since_switch = 0
+
+        async def fetch(url: str) -> bytes:
+            async with semaphore:
+                if stop_event is not None and stop_event.is_set():
+                    return b""
+
+                content = await self.core.fetch(url, get_bytes=True, save_cache=False)
+                samples.append((time.perf_counter(), len(content)))
+                return content
+
+        pending: deque = deque() # (segment index, media start, task), in media order
+        position = 0 # Next segment of the current variant to schedule
+        done = 0
+        received = 0
+        missing: List[int] = []
+        missing_urls: List[str] = []
+        cancelled = False
+        temporary = f"{path}.tmp"
+        try:
+            with open(temporary, "wb") as output:
+                while position < len(variants[current].segments) or pending:
+                    while len(pending) < self.max_workers * 2 and position < len(variants[current].segments):
+                        variant = variants[current]
+                        pending.append((done + len(pending), variant.starts[position],
+                                        variant.segments[position],
+                                        asyncio.ensure_future(fetch(variant.segments[position]))))
+                        position += 1
+
+                    index, media_start, url, task = pending.popleft()
+                    try:
+                        content = await task
+
+                    except Exception as e:
+                        self.logger.warning(f"Segment {index} failed: {e}, retrying")
+                        owner = next(i for i, variant in enumerate(variants) if url in variant.segments)
+                        source, content = await self._recover(variants, owner, url, media_start, fetch)
+                        if source is not None and source != owner:
+                            decisions.append(QualityDecision(round(time.perf_counter() - started, 3), index,
+                                                             variants[owner].height, variants[source].height, None,
+                                                             None, "fallback"))
+
+                    if stop_event is not None and stop_event.is_set():
+                        cancelled = True
+                        break
+
+                    done += 1
+                    since_switch += 1
+                    if content:
+                        received += len(content)
+                        await asyncio.to_thread(output.write, content)
+
+                    else:
+                        missing.append(index)
+                        missing_urls.append(url)
+
+                    if callback:
+                        callback(done, total)
+
+                    throughput = self._throughput(samples)
+                    if (self.target_time is None or current == 0 or throughput is None
+                            or since_switch < self.min_samples):
+                        continue
+
+                    elapsed = time.perf_counter() - started
+                    old = variants[current]
+                    # Everything from the scheduling frontier on can still come from another variant, what is in
+                    # flight will arrive in the old one
+                    frontier = old.starts[position] if position < len(old.starts) else old.duration
+                    remaining_media = old.duration - frontier
+                    media_done = pending[0][1] if pending else frontier
+                    committed = elapsed + old.bandwidth / 8 * (frontier - media_done) / (throughput * self.safety)
+                    if remaining_media <= 0 or self._fits(old, remaining_media, throughput, committed):
+                        continue
+
+                    projected = committed + old.bandwidth / 8 * remaining_media / (throughput * self.safety)
+                    current = self._pick(variants[:current], remaining_media, throughput, committed)
+                    new = variants[current]
+                    # Continue the new variant at the first segment that starts at (or after) the frontier
+                    position = next((i for i, start in enumerate(new.starts) if start >= frontier - 0.01),
+                                    len(new.segments))
+                    total = done + len(pending) + len(new.segments) - position
+                    since_switch = 0
+                    samples.clear()
+                    decisions.append(QualityDecision(round(elapsed, 3), done + len(pending), old.height, new.height,
+                                                     throughput, projected, "downgrade"))
+                    self.logger.info(f"Downgrading {old.height}p -> {new.height}p at segment {done + len(pending)}")
+
+        finally:
+            for _, _, _, task in pending:
+                task.cancel()
+
+        status = "cancelled" if cancelled else ("failed" if missing else "completed")
+        if status == "completed":
+            if remux:
+                await asyncio.to_thread(self.core._convert_ts_to_mp4, temporary, path, callback_remux)
+                os.remove(temporary)
+
+            else:
+                os.replace(temporary, path)
+
+        elif os.path.exists(temporary):
+            os.remove(temporary)
+
+        return AdaptiveDownloadReport(status=status, total=total, downloaded=done - len(missing), missing=missing,
+                                      missing_urls=missing_urls, segment_dir=None, segment_state_path=None,
+                                      start_segment=0, quality=variants[current].height, decisions=decisions,
+                                      variants=[{"height": v.height, "bandwidth": v.bandwidth} for v in variants],
+                                      bytes=received, elapsed=time.perf_counter() - started)
+
+    @staticmethod
+    def _throughput(samples: deque) -> float | None:
+        """Bytes per second over the sample window, all workers together"""
+        if len(samples) < 2:
+            return None
+
+        span = samples[-1][0] - samples[0][0]
+        if span <= 0:
+            return None
+
+        return sum(size for _, size in list(samples)[1:]) / span
@@ -0,0 +1,333 @@
+"""
+Streaming analytics over listing generators with bounded memory.
+
+ListingAnalytics attaches to any async generator of videos (search, channel / pornstar videos, playlists, account
+listings, crawls) and keeps
+
+    - approximate top-k tags and uploaders (Space-Saving)
+    - quantile sketches of views, duration and rating (log-bucketed, relative error bound)
+    - counts per SortVideoTime bucket, and per SortQuality bucket when the resolution is known (see ListingAnalytics)
+
+Memory is bounded by the sketch sizes, not by the number of videos. snapshot() returns a JSON-serializable dict and
+snapshots of different workers can be merged with merge_snapshots().
+
+    analytics = ListingAnalytics()
+    async for video in analytics.track(client.search("query", pages=10)):
+        ...
+    print(analytics.top_tags(10), analytics.views.quantile(0.5))
+"""
+import math
+
+from typing import Any, AsyncGenerator, AsyncIterable, Callable, Dict, Iterable, List, Tuple
+
+from .consts import safe_attribute, url_slug
+from .local_index import DURATION_RANGES, parse_count, parse_duration
+from .sorting import SortQuality, SortVideoTime
+
+
+MIN_HEIGHT = {
+    SortQuality.Sort_720p: 720,
+    SortQuality.Sort_1080_plus: 1080,
+}
+
+
+class TopK:
+    """Space-Saving heavy hitters. Counts are over-estimated by at most `error` per item."""
+    def __init__(self, capacity: int = 200):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def add(self, item: str, count: int = 1) -> None:
+        if item in self.counts:
+            self.counts[item] += count
+            return
+
+        if len(self.counts) < self.capacity:
+            self.counts[item] = count
+            self.errors[item] = 0
+            return
+
+        # Replace the smallest counter, the newcomer inherits its count as error bound
+        victim = min(self.counts, key=self.counts.__getitem__)
+        floor = self.counts.pop(victim)
+        del self.errors[victim]
+        self.counts[item] = floor + count
+        self.errors[item] = floor
+
+    def top(self, k: int = 10) -> List[Tuple[str, int, int]]:
+        """:return: (list) (item, estimated count, maximum overestimate), highest first"""
+        items = sorted(self.counts.items(), key=lambda pair: (-pair[1], pair[0]))[:k]
+        return [(item, count, self.errors[item]) for item, count in items]
+
+    def merge(self, other: "TopK") -> None:
+        # Items missing in one summary may still have occurred up to its smallest count
+        floor_self = min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+        floor_other = min(other.counts.values()) if len(other.counts) >= other.capacity else 0
+        counts: Dict[str, int] = {}
+        errors: Dict[str, int] = {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, floor_self) + other.counts.get(item, floor_other)
+            errors[item] = self.errors.get(item, floor_self) + other.errors.get(item, floor_other)
+
+        kept = sorted(counts, key=lambda item: (-counts[item], item))[:self.capacity]
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"capacity": self.capacity, "counts": self.counts, "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TopK":
+        top_k = cls(capacity=data["capacity"])
+        top_k.counts = dict(data["counts"])
+        top_k.errors = dict(data["errors"])
+        return top_k
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch for non-negative values. Every quantile is within `relative_accuracy` of the exact
+    value as long as no buckets had to be collapsed (only happens beyond `max_buckets`, for the smallest values).
+    """
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        if value < 0:
+            raise ValueError("QuantileSketch only takes non-negative values")
+
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value == 0:
+            self.zeros += 1
+            return
+
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+    def _collapse(self) -> None:
+        lowest, second = sorted(self.buckets)[:2]
+        self.buckets[second] += self.buckets.pop(lowest)
+
+    def quantile(self, q: float) -> float | None:
+        """:param q: (float) 0.0 - 1.0, e.g. 0.5 for the median"""
+        if not self.count:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+
+        return self.max
+
+    @property
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def merge(self, other: "QuantileSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative_accuracy can be merged")
+
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+        while len(self.buckets) > self.max_buckets:
+            self._collapse()
+
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"relative_accuracy": self.relative_accuracy, "max_buckets": self.max_buckets,
+                "buckets": {str(key): count for key, count in self.buckets.items()}, "zeros": self.zeros,
+                "count": self.count, "total": self.total, "min": self.min if self.count else None,
+                "max": self.max if self.count else None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(relative_accuracy=data["relative_accuracy"], max_buckets=data["max_buckets"])
+        sketch.buckets = {int(key): count for key, count in data["buckets"].items()}
+        sketch.zeros = data["zeros"]
+        sketch.count = data["count"]
+        sketch.total = data["total"]
+        sketch.min = data["min"] if data["min"] is not None else math.inf
+        sketch.max = data["max"] if data["max"] is not None else -math.inf
+        return sketch
+
+
+class ListingAnalytics:
+    """
+    The resolution isn't part of the watch page or the listing data a Video is built from, it's only known after
+    fetching the HLS playlist. So the SortQuality counts stay "unknown" unless `height` is given, e.g. a callable
+    reading the height of playlists the caller fetches anyway (for downloads).
+    """
+    def __init__(self, top_k_capacity: int = 200, relative_accuracy: float = 0.01,
+                 height: Callable[[Any], int | None] | None = None):
+        """
+        :param top_k_capacity: (int) Counters kept per top-k summary, higher means more accurate ranks
+        :param relative_accuracy: (float) Relative error of the quantiles
+        :param height: (callable) Returns the resolution of a video for the SortQuality counts, videos without a
+                       height are counted as "unknown"
+        """
+        self.height = height
+        self.videos = 0
+        self.tags = TopK(top_k_capacity)
+        self.uploaders = TopK(top_k_capacity)
+        self.views = QuantileSketch(relative_accuracy)
+        self.duration = QuantileSketch(relative_accuracy)
+        self.rating = QuantileSketch(relative_accuracy)
+        self.quality_counts: Dict[str, int] = {SortQuality.Sort_all: 0, **{key: 0 for key in MIN_HEIGHT},
+                                               "unknown": 0}
+        self.duration_counts: Dict[str, int] = {SortVideoTime.Sort_all: 0, **{key: 0 for key in DURATION_RANGES},
+                                                "under_1min": 0, "unknown": 0}
+
+    def observe(self, video: Any) -> None:
+        """Adds one video. Fields that can't be read (e.g. with Video.init(fields=...)) are skipped."""
+        self.videos += 1
+        for tag in safe_attribute(video, "tags") or []:
+            self.tags.add(tag.lower())
+
+        author = safe_attribute(video, "author")
+        uploader = url_slug(safe_attribute(author, "url")) if author is not None else None
+        if uploader:
+            self.uploaders.add(uploader)
+
+        views = parse_count(safe_attribute(video, "views"))
+        if views is not None:
+            self.views.add(views)
+
+        likes = parse_count(safe_attribute(video, "likes"))
+        dislikes = parse_count(safe_attribute(video, "dislikes"))
+        if likes is not None and dislikes is not None and likes + dislikes:
+            self.rating.add(likes / (likes + dislikes))
+
+        self.duration_counts[SortVideoTime.Sort_all] += 1
+        duration = parse_duration(safe_attribute(video, "length"))
+        if duration is None:
+            self.duration_counts["unknown"] += 1
+
+        else:
+            self.duration.add(duration)
+            buckets = [key for key, (lower, upper) in DURATION_RANGES.items()
+                       if duration >= lower and (upper is None or duration < upper)]
+            for key in buckets or ["under_1min"]:
+                self.duration_counts[key] += 1
+
+        self.quality_counts[SortQuality.Sort_all] += 1
+        height = self.height(video) if self.height is not None else None
+        if height is None:
+            self.quality_counts["unknown"] += 1
+
+        else:
+            for key, minimum in MIN_HEIGHT.items():
+                if height >= minimum:
+                    self.quality_counts[key] += 1
+
+    async def track(self, videos: AsyncIterable[Any]) -> AsyncGenerator[Any, None]:
+        """Passes the videos of a listing through unchanged, observing each one"""
+        async for video in videos:
+            self.observe(video)
+            yield video
+
+    async def consume(self, videos: AsyncIterable[Any]) -> "ListingAnalytics":
+        """Drains a listing without keeping the videos"""
+        async for video in videos:
+            self.observe(video)
+
+        return self
+
+    def top_tags(self, k: int = 10) -> List[Tuple[str, int, int]]:
+        return self.tags.top(k)
+
+    def top_uploaders(self, k: int = 10) -> List[Tuple[str, int, int]]:
+        return self.uploaders.top(k)
+
+    def merge(self, other: "ListingAnalytics") -> None:
+        self.videos += other.videos
+        self.tags.merge(other.tags)
+        self.uploaders.merge(other.uploaders)
+        self.views.merge(other.views)
+        self.duration.merge(other.duration)
+        self.rating.merge(other.rating)
+        for key, count in other.quality_counts.items():
+            self.quality_counts[key] = self.quality_counts.get(key, 0) + count
+
+        for key, count in other.duration_counts.items():
+            self.duration_counts[key] = self.duration_counts.get(key, 0) + count
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable state, e.g. to send it from a worker to an aggregator"""
+        return {
+            "videos": self.videos,
+            "tags": self.tags.to_dict(),
+            "uploaders": self.uploaders.to_dict(),
+            "views": self.views.to_dict(),
+            "duration": self.duration.to_dict(),
+            "rating": self.rating.to_dict(),
+            "quality_counts": dict(self.quality_counts),
+            "duration_counts": dict(self.duration_counts),
+        }
+
+    @classmethod
+    def from_snapshot(cls, data: Dict[str, Any]) -> "ListingAnalytics":
+        analytics = cls()
+        analytics.videos = data["videos"]
+        analytics.tags = TopK.from_dict(data["tags"])
+        analytics.uploaders = TopK.from_dict(data["uploaders"])
+        analytics.views = QuantileSketch.from_dict(data["views"])
+        analytics.duration = QuantileSketch.from_dict(data["duration"])
+        analytics.rating = QuantileSketch.from_dict(data["rating"])
+        analytics.quality_counts = dict(data["quality_counts"])
+        analytics.duration_counts = dict(data["duration_counts"])
+        return analytics
+
+    def summary(self, k: int = 10, quantiles: Iterable[float] = (0.5, 0.9, 0.99)) -> Dict[str, Any]:
+        """Human-readable overview: top-k lists, quantiles and bucket counts"""
+        quantiles = list(quantiles)
+        return {
+            "videos": self.videos,
+            "top_tags": self.top_tags(k),
+            "top_uploaders": self.top_uploaders(k),
+            **{name: {f"p{q * 100:g}": sketch.quantile(q) for q in quantiles}
+               for name, sketch in (("views", self.views), ("duration", self.duration), ("rating", self.rating))},
+            "quality_counts": dict(self.quality_counts),
+            "duration_counts": dict(self.duration_counts),
+        }
+
+
+def merge_snapshots(snapshots: Iterable[Dict[str, Any]]) -> ListingAnalytics:
+    """Combines the snapshots of several workers into one ListingAnalytics"""
+    merged = None
+    for snapshot in snapshots:
+        analytics = ListingAnalytics.from_snapshot(snapshot)
+        if merged is None:
+            merged = analytics
+
+        else:
+            merged.merge(analytics)
+
+    return merged if merged is not None else ListingAnalytics()
@@ -1,8 +1,8 @@
 import re
 import json
 
-from typing import List
-from urllib.parse import urljoin
+from typing import Any, List
+from urllib.parse import urljoin, urlparse
 from bs4 import SoupStrainer, BeautifulSoup
 
 try:
@@ -14,9 +14,45 @@ except (ModuleNotFoundError, ImportError):
 
 
 REGEX_VIDEO_CHECK_URL = re.compile(r'(.*?)xvideos.com/video(.*?)')
+REGEX_VIDEO_ID = re.compile(r'xvideos\.com/video(?:\.([a-z0-9]+)|(\d+))(?:/|$|\?)')
 REGEX_VIDEO_M3U8 = re.compile(r"html5player\.setVideoHLS\('([^']+)'\);")
 REGEX_IFRAME = re.compile(r'video-embed" type="text" readonly value="(.*?)" class="form-control"')
 REGEX_SEARCH_SCRAPE_VIDEOS = re.compile(r'none;"><a href="(.*?)">', re.DOTALL)
+REGEX_PREVIEW_THUMBS = re.compile(r'/thumbs(169)?(xnxx)?(l*|poster)/')
+REGEX_PREVIEW_SUFFIX = re.compile(r'-(\d+)')
+
+# Markers for streaming fetches, a video page can stop downloading once all requested markers have been seen
+MARKER_JSON_LD = re.compile(r'<script type="application/ld\+json">.*?</script>', re.DOTALL)
+MARKER_HLS = re.compile(r"html5player\.setVideoHLS\('[^']+'\);.*?</script>", re.DOTALL)
+MARKER_RATING = re.compile(r'class="rating-total-txt"[^>]*>[^<]*<')
+STREAM_MARKERS_DEFAULT = [MARKER_JSON_LD, MARKER_HLS, MARKER_RATING]
+REGEX_JSON_LD = re.compile(r'<script[^>]*type="application/ld\+json"[^>]*>(.*?)</script>', re.DOTALL)
+
+# Bot challenge pages that are served with a 200 instead of the requested page
+REGEX_CHALLENGE = re.compile(r'challenge-platform|cf_chl_opt|<title>Just a moment\.\.\.</title>|/cdn-cgi/challenge')
+
+# Which marker a Video field needs for Video.init(fields=...). None means the field can be anywhere in the page,
+# so the whole page has to be fetched.
+VIDEO_FIELD_MARKERS = {
+    "title": MARKER_JSON_LD,
+    "description": MARKER_JSON_LD,
+    "thumbnail_url": MARKER_JSON_LD,
+    "preview_video_url": MARKER_JSON_LD,
+    "publish_date": MARKER_JSON_LD,
+    "content_url": MARKER_JSON_LD,
+    "cdn_url": MARKER_JSON_LD,
+    "m3u8_base_url": MARKER_HLS,
+    "likes": MARKER_RATING,
+    "dislikes": MARKER_RATING,
+    "rating_votes": MARKER_RATING,
+    "tags": None,
+    "views": None,
+    "comment_count": None,
+    "author": None,
+    "length": None,
+    "pornstars": None,
+    "embed_url": None,
+}
 
 headers = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
@@ -39,6 +75,38 @@ session_token_auth = <token>
 }
 """
 
+def video_id_from_url(url: str) -> str | None:
+    """
+    Returns the video id of a watch page URL. Different slugs, subdomains and www / no www all map to the same id.
+    """
+    match = REGEX_VIDEO_ID.search(url)
+    if not match:
+        return None
+
+    return match.group(1) or match.group(2)
+
+
+def safe_attribute(obj: Any, attribute: str) -> Any:
+    """
+    Returns the attribute or None if it can't be loaded (missing on the page, object failed to initialize...).
+    """
+    try:
+        return getattr(obj, attribute)
+
+    except Exception:
+        return None
+
+
+def url_slug(url: str | None) -> str | None:
+    """
+    Returns the last path segment of a URL, e.g. the name of a channel / pornstar profile.
+    """
+    if not url:
+        return None
+
+    return urlparse(url).path.rstrip("/").rsplit("/", 1)[-1]
+
+
 def extractor_json(html: str) -> List[str]:
     """
     Extracts the video URLs from a HTML. This function needs to be given to the iterator function
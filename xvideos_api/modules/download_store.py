@@ -0,0 +1,221 @@
+"""
+Download store keyed on the canonical video id and quality.
+
+The same video reached under a different slug or with or without www is downloaded only once.
+Files live at <root>/<first two chars of the id>/<id>_<quality>.mp4 and an SQLite index maps (id, quality) to the
+file, so deciding whether something has to be downloaded is a single primary key lookup, no directory scan.
+Unfinished downloads keep their segment directory and state file next to the object and continue from there.
+
+    store = DownloadStore("videos")
+    await video.download(quality="best", path="./", store=store) # Hard-links ./<title>.mp4 to the stored file
+"""
+import os
+import time
+import shutil
+import sqlite3
+import asyncio
+import logging
+import threading
+
+from dataclasses import dataclass
+from typing import Any, Callable
+from base_api.base import setup_logger
+from base_api.modules.type_hints import DownloadReport
+
+from .consts import video_id_from_url
+
+
+@dataclass
+class StoreEntry:
+    video_id: str
+    quality: str
+    path: str
+    status: str # "partial" or "complete"
+    size: int | None
+    segments: int | None
+    updated_at: float
+
+    @property
+    def complete(self) -> bool:
+        return self.status == "complete"
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+class DownloadStore:
+    def __init__(self, root: str, link: bool = True):
+        """
+        :param root: (str) Storage directory, the index is kept in <root>/index.db
+        :param link: (bool) Hard-link stored files to the requested path (falls back to a copy across filesystems)
+        """
+        self.root = root
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+        self._lock_users: dict[tuple[str, str], int] = {} # A lock is dropped once nobody holds or waits for it
+        self.logger = setup_logger(name="XVIDEOS API - [DownloadStore]", log_file=None, level=logging.ERROR)
+        os.makedirs(root, exist_ok=True)
+        self.lock = threading.Lock() # The index is used from worker threads, one statement at a time
+        self.index = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False)
+        self.index.execute("PRAGMA journal_mode=WAL")
+        self.index.execute("""
+            CREATE TABLE IF NOT EXISTS downloads (
+                video_id TEXT NOT NULL,
+                quality TEXT NOT NULL,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                size INTEGER,
+                segments INTEGER,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (video_id, quality)
+            ) WITHOUT ROWID""")
+
+    def enable_logging(self, log_file: str | None = None, level: int | None = None, log_ip: str | None = None,
+                       log_port: int | None = None):
+        if not level:
+            level = logging.DEBUG
+        self.logger = setup_logger(name="XVIDEOS API - [DownloadStore]", log_file=log_file, level=level,
+                                   http_ip=log_ip, http_port=log_port)
+
+    @staticmethod
+    def key(url: str, quality: Any) -> tuple[str, str]:
+        video_id = video_id_from_url(url)
+        if video_id is None:
+            raise ValueError(f"Can't find a video id in: {url}")
+
+        return video_id, str(quality).lower()
+
+    def object_path(self, video_id: str, quality: str) -> str:
+        # Two character fan-out keeps directories small with millions of files
+        return os.path.join(self.root, video_id[:2], f"{video_id}_{quality}.mp4")
+
+    def lookup(self, url: str, quality: Any) -> StoreEntry | None:
+        """
+        :return: (StoreEntry) The index entry for this video and quality, None if it was never started
+        """
+        with self.lock:
+            row = self.index.execute("SELECT * FROM downloads WHERE video_id = ? AND quality = ?",
+                                     self.key(url, quality)).fetchone()
+
+        return StoreEntry(*row) if row else None
+
+    def has(self, url: str, quality: Any) -> bool:
+        """True if a complete file for this video and quality is on disk"""
+        entry = self.lookup(url, quality)
+        return entry is not None and entry.complete and os.path.exists(entry.path)
+
+    def _record(self, video_id: str, quality: str, path: str, status: str, size: int | None = None,
+                segments: int | None = None) -> None:
+        with self.lock, self.index:
+            self.index.execute("INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (video_id, quality, path, status, size, segments, time.time()))
+
+    def _place(self, source: str, target: str | None) -> None:
+        if not target or os.path.abspath(source) == os.path.abspath(target):
+            return
+
+        if os.path.exists(target):
+            if os.path.samefile(source, target):
+                return
+
+            os.remove(target)
+
+        os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+        if not self.link:
+            shutil.copy2(source, target)
+            return
+
+        try:
+            os.link(source, target)
+
+        except OSError as e: # Different filesystem or no hard-link support
+            self.logger.debug(f"Hard-link {source} -> {target} failed ({e}), copying instead")
+            shutil.copy2(source, target)
+
+    @staticmethod
+    def _has_hls(video) -> bool:
+        try:
+            return bool(video.m3u8_base_url)
+
+        except AttributeError: # The HLS regex found nothing on the page
+            return False
+
+    async def download(self, video, quality, path: str | None = None, callback: Callable | None = None,
+                       return_report: bool = False, **kwargs) -> bool | DownloadReport:
+        """
+        Downloads `video` unless a complete file for the same id and quality is stored already.
+
+        :param video: (Video) The video
+        :param quality: (str, int) The quality, part of the key
+        :param path: (str) Where the file should appear (hard-link), None to only keep it in the store
+        :param callback: (callable) Progress callback, see Video.download
+        :param return_report: (bool) Return a DownloadReport instead of a bool
+        :param kwargs: Passed to BaseCore.download (remux, callback_remux, stop_event, ...)
+        """
+        key = self.key(video.url, quality)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        try:
+            async with lock: # Same video under two URLs at once: fetch it once
+                return await self._download(video, quality, key, path, callback, return_report, **kwargs)
+
+        finally:
+            self._lock_users[key] -= 1
+            if not self._lock_users[key]:
+                del self._lock_users[key]
+                del self._locks[key]
+
+    async def _download(self, video, quality, key: tuple[str, str], path: str | None, callback: Callable | None,
+                        return_report: bool, **kwargs) -> bool | DownloadReport:
+        video_id, quality_key = key
+        entry = await asyncio.to_thread(self.lookup, video.url, quality)
+        if entry is not None and entry.complete and os.path.exists(entry.path):
+            self.hits += 1
+            self.logger.info(f"{video_id} ({quality_key}) is stored already: {entry.path}")
+            await asyncio.to_thread(self._place, entry.path, path)
+            report = DownloadReport(status="completed", total=entry.segments or 0, downloaded=entry.segments or 0,
+                                    missing=[], missing_urls=[], segment_dir=None, segment_state_path=None,
+                                    start_segment=0, quality=quality)
+            return report if return_report else True
+
+        self.misses += 1
+        object_path = self.object_path(video_id, quality_key)
+        os.makedirs(os.path.dirname(object_path), exist_ok=True)
+        if entry is None or entry.path != object_path:
+            await asyncio.to_thread(self._record, video_id, quality_key, object_path, "partial")
+
+        if not self._has_hls(video):
+            # Only videos without a playlist use the legacy download, every other failure is the caller's to see
+            self.logger.warning(f"{video_id} doesn't have an HLS stream, using legacy downloading instead...")
+            await video.core.legacy_download(path=object_path, callback=callback, url=video.cdn_url)
+            report = DownloadReport(status="completed", total=0, downloaded=0, missing=[], missing_urls=[],
+                                    segment_dir=None, segment_state_path=None, start_segment=0, quality=quality)
+
+        else:
+            # Segments on disk survive crashes, the state file survives failed / cancelled runs
+            kwargs.setdefault("cleanup_on_stop", False)
+            report = await video.core.download(video=video, quality=quality, path=object_path, callback=callback,
+                                               segment_state_path=f"{object_path}.state.json",
+                                               segment_dir=f"{object_path}.segments", return_report=True, **kwargs)
+
+        if isinstance(report, DownloadReport) and report.status == "completed" and os.path.exists(object_path):
+            await asyncio.to_thread(self._record, video_id, quality_key, object_path, "complete",
+                                    size=os.path.getsize(object_path), segments=report.total)
+            await asyncio.to_thread(self._place, object_path, path)
+
+        if return_report:
+            return report
+
+        return isinstance(report, DownloadReport) and report.status == "completed"
+
+    def stats(self) -> dict:
+        with self.lock:
+            rows = dict(self.index.execute("SELECT status, COUNT(*) FROM downloads GROUP BY status").fetchall())
+
+        return {"complete": rows.get("complete", 0), "partial": rows.get("partial", 0), "hits": self.hits,
+                "misses": self.misses}
+
+    def close(self) -> None:
+        self.index.close()
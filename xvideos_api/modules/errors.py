@@ -35,4 +35,13 @@ class ProxyError(Exception):
 
 class UnknownNetworkError(Exception):
     def __init__(self, msg):
-        self.msg = msg
\ No newline at end of file
+        self.msg = msg
+
+class ReplayMiss(Exception):
+    def __init__(self, msg: str):
+        self.msg = msg
+
+
+class IncompletePage(Exception):
+    def __init__(self, msg: str):
+        self.msg = msg
@@ -0,0 +1,250 @@
+"""
+Persistent crawl frontier.
+
+Holds listing pages and video URLs that still have to be processed. Any number of processes (or machines sharing a
+database) lease work items from it, so nothing is processed twice. A lease that isn't completed in time (e.g. because
+the worker crashed) simply becomes available again.
+
+    frontier = CrawlFrontier(SQLiteFrontierBackend("crawl.db"))
+    frontier.add_pages(client.search_page_urls("query", pages=20))
+    async for video in crawl(client, frontier, worker_id="node-1"):
+        ...
+"""
+import time
+import uuid
+import sqlite3
+import asyncio
+import threading
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Dict, Iterable, List
+
+from .consts import extractor_account, extractor_html, extractor_json, video_id_from_url
+from .errors import NotFound
+
+
+EXTRACTORS = {
+    "account": extractor_account,
+    "html": extractor_html,
+    "json": extractor_json,
+}
+
+
+@dataclass
+class WorkItem:
+    key: str
+    kind: str # "page" or "video"
+    url: str
+    extractor: str | None
+    attempts: int
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+class FrontierBackend(ABC):
+    """
+    Storage interface of the frontier. Implement this to put the frontier on a different queue (Redis, Postgres, ...).
+    All methods have to be safe to call from several processes at the same time.
+    """
+    @abstractmethod
+    def add(self, items: Iterable[WorkItem]) -> int:
+        """Adds items whose key isn't known yet, returns how many were new"""
+
+    @abstractmethod
+    def lease(self, worker_id: str, kind: str, limit: int, lease_time: float) -> List[WorkItem]:
+        """Leases up to `limit` pending (or expired) items of `kind` to `worker_id`"""
+
+    @abstractmethod
+    def complete(self, key: str, worker_id: str) -> None:
+        """Marks an item leased by `worker_id` as done"""
+
+    @abstractmethod
+    def fail(self, key: str, worker_id: str, error: str, max_attempts: int) -> None:
+        """Puts the item back, or marks it failed once it used up `max_attempts`"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Item counts per state: pending, leased, done, failed"""
+
+
+class SQLiteFrontierBackend(FrontierBackend):
+    def __init__(self, path: str, timeout: float = 30.0):
+        """
+        :param path: (str) Database file, shared by all workers on a host (or on a shared filesystem)
+        :param timeout: (float) Seconds to wait for the database lock
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                url TEXT NOT NULL,
+                extractor TEXT,
+                state TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                added REAL NOT NULL
+            )""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS items_state ON items (kind, state, lease_expires)")
+
+    def add(self, items: Iterable[WorkItem]) -> int:
+        now = time.time()
+        rows = [(item.key, item.kind, item.url, item.extractor, now) for item in items]
+        with self.lock:
+            before = self.connection.total_changes
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO items (key, kind, url, extractor, added) VALUES (?, ?, ?, ?, ?)", rows)
+            self.connection.execute("COMMIT")
+            return self.connection.total_changes - before
+
+    def lease(self, worker_id: str, kind: str, limit: int, lease_time: float) -> List[WorkItem]:
+        now = time.time()
+        with self.lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers can never lease the same rows
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.connection.execute("""
+                    SELECT key, kind, url, extractor, attempts FROM items
+                    WHERE kind = ? AND (state = 'pending' OR (state = 'leased' AND lease_expires < ?))
+                    ORDER BY rowid LIMIT ?""", (kind, now, limit)).fetchall()
+                self.connection.executemany(
+                    "UPDATE items SET state = 'leased', owner = ?, lease_expires = ? WHERE key = ?",
+                    [(worker_id, now + lease_time, row[0]) for row in rows])
+                self.connection.execute("COMMIT")
+
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        return [WorkItem(key=row[0], kind=row[1], url=row[2], extractor=row[3], attempts=row[4]) for row in rows]
+
+    def complete(self, key: str, worker_id: str) -> None:
+        with self.lock:
+            self.connection.execute(
+                "UPDATE items SET state = 'done', owner = NULL, lease_expires = NULL WHERE key = ? AND owner = ?",
+                (key, worker_id))
+
+    def fail(self, key: str, worker_id: str, error: str, max_attempts: int) -> None:
+        with self.lock:
+            self.connection.execute("""
+                UPDATE items SET attempts = attempts + 1, error = ?, owner = NULL, lease_expires = NULL,
+                state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END
+                WHERE key = ? AND owner = ?""", (error, max_attempts, key, worker_id))
+
+    def stats(self) -> Dict[str, int]:
+        now = time.time()
+        with self.lock:
+            rows = self.connection.execute("""
+                SELECT CASE WHEN state = 'leased' AND lease_expires < ? THEN 'pending' ELSE state END, COUNT(*)
+                FROM items GROUP BY 1""", (now,)).fetchall()
+
+        stats = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+        for state, count in rows:
+            stats[state] += count
+
+        return stats
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+class CrawlFrontier:
+    def __init__(self, backend: FrontierBackend, max_attempts: int = 3):
+        """
+        :param backend: (FrontierBackend) Where the work items live
+        :param max_attempts: (int) Attempts before an item is marked failed
+        """
+        self.backend = backend
+        self.max_attempts = max_attempts
+
+    def add_pages(self, urls: Iterable[str], extractor: str = "account") -> int:
+        """
+        :param urls: (list) Listing page URLs, e.g. from Client.search_page_urls() or f"{channel.url}/videos/best/{i}"
+        :param extractor: (str) Name of the extractor in EXTRACTORS that pulls video URLs out of the page
+        :return: (int) Number of pages that were new
+        """
+        if extractor not in EXTRACTORS:
+            raise ValueError(f"Unknown extractor: {extractor}")
+
+        return self.backend.add(WorkItem(key=f"page:{url}", kind="page", url=url, extractor=extractor, attempts=0)
+                                for url in urls)
+
+    def add_videos(self, urls: Iterable[str]) -> int:
+        """Adds video URLs, deduplicated by video id. Returns the number of videos that were new."""
+        items = []
+        for url in urls:
+            video_id = video_id_from_url(url)
+            key = f"video:{video_id}" if video_id else f"video:{url}"
+            items.append(WorkItem(key=key, kind="video", url=url, extractor=None, attempts=0))
+
+        return self.backend.add(items)
+
+    def stats(self) -> Dict[str, int]:
+        return self.backend.stats()
+
+
+async def crawl(client, frontier: CrawlFrontier, worker_id: str | None = None, batch_size: int = 10,
+                lease_time: float = 300.0, poll_interval: float = 5.0,
+                fields: list[str] | None = None) -> AsyncGenerator[Any, None]:
+    """
+    Works through the frontier until nothing is pending or leased anymore. Listing pages are expanded into videos
+    first, then videos are initialized and yielded. Run this in as many processes as you like.
+
+    :param client: (Client) The client used for fetching
+    :param frontier: (CrawlFrontier) The shared frontier
+    :param worker_id: (str) Unique id of this worker, generated if not given
+    :param batch_size: (int) Items leased (and processed concurrently) at once
+    :param lease_time: (float) Seconds until an unfinished lease is handed to another worker
+    :param poll_interval: (float) Seconds to wait when other workers still hold leases
+    :param fields: (list) Passed to Video.init, see Client.get_video
+    """
+    worker_id = worker_id or uuid.uuid4().hex
+    backend = frontier.backend
+
+    async def process_page(item: WorkItem) -> None:
+        content = await client.core.fetch(item.url)
+        if not isinstance(content, str): # 404 / 204 come back as the Response
+            raise NotFound(f"Server returned {getattr(content, 'status_code', None)} for: {item.url}")
+
+        await asyncio.to_thread(frontier.add_videos, EXTRACTORS[item.extractor](content))
+
+    while True:
+        pages = await asyncio.to_thread(backend.lease, worker_id, "page", batch_size, lease_time)
+        if pages:
+            results = await asyncio.gather(*(process_page(item) for item in pages), return_exceptions=True)
+            for item, result in zip(pages, results):
+                if isinstance(result, Exception):
+                    await asyncio.to_thread(backend.fail, item.key, worker_id, repr(result), frontier.max_attempts)
+
+                else:
+                    await asyncio.to_thread(backend.complete, item.key, worker_id)
+
+            continue
+
+        videos = await asyncio.to_thread(backend.lease, worker_id, "video", batch_size, lease_time)
+        if videos:
+            results = await asyncio.gather(*(client.get_video(item.url, fields=fields) for item in videos),
+                                           return_exceptions=True)
+            for item, result in zip(videos, results):
+                if isinstance(result, Exception):
+                    await asyncio.to_thread(backend.fail, item.key, worker_id, repr(result), frontier.max_attempts)
+
+                else:
+                    await asyncio.to_thread(backend.complete, item.key, worker_id)
+                    yield result
+
+            continue
+
+        stats = await asyncio.to_thread(backend.stats)
+        if not stats["pending"] and not stats["leased"]:
+            return
+
+        await asyncio.sleep(poll_interval) # Other workers hold leases that may still expire
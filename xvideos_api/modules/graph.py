@@ -0,0 +1,230 @@
+"""
+Breadth-first crawl over the catalogue graph.
+
+Starting from any video, channel or pornstar URLs, the crawler follows
+
+    video    -> uploader (uploaded_by), pornstars (features), tags (tagged)
+    pornstar -> channels (worked_with), videos (has_video)
+    channel  -> channels (worked_with), videos (has_video)
+
+and streams every node and edge as soon as it is known. Every node is fetched at most once per crawl, and every edge
+points to a node that is reported as well.
+
+    async for item in GraphCrawler(client, max_depth=2).crawl(["https://www.xvideos.com/video.xyz/..."]):
+        if isinstance(item, GraphEdge):
+            ...
+"""
+import asyncio
+
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+from typing import Any, AsyncGenerator, Dict, List
+
+from .consts import REGEX_VIDEO_CHECK_URL, extractor_account, video_id_from_url
+
+
+@dataclass
+class GraphNode:
+    id: str
+    kind: str # "video", "channel", "pornstar" or "tag"
+    url: str | None
+    depth: int
+    data: Any = None # The initialized Video / Channel / Pornstar object
+    error: str | None = None
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+@dataclass
+class GraphEdge:
+    source: str
+    target: str
+    relation: str
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+@dataclass
+class _Pending:
+    id: str
+    kind: str
+    url: str | None
+    children: List["_Pending"] = field(default_factory=list)
+
+
+def node_id(kind: str, url: str) -> str:
+    """Stable id for a node, so different spellings of the same URL are visited once"""
+    if kind == "video":
+        return f"video:{video_id_from_url(url) or url}"
+
+    if kind == "tag":
+        return f"tag:{url.lower()}"
+
+    path = urlparse(url if "://" in url else f"https://{url}").path.rstrip("/").lower()
+    if kind == "channel" and path.startswith("/channels/"):
+        path = path[len("/channels"):] # Channels are linked with and without the /channels prefix
+
+    return f"{kind}:{path}"
+
+
+def classify(url: str) -> str:
+    if REGEX_VIDEO_CHECK_URL.match(url):
+        return "video"
+
+    if "/pornstars" in url or "/model" in url:
+        return "pornstar"
+
+    return "channel"
+
+
+class GraphCrawler:
+    def __init__(self, client, max_depth: int = 2, max_nodes_per_depth: int | Dict[int, int] = 100,
+                 max_fanout: int = 20, concurrency: int = 5, videos_per_profile: int = 0,
+                 include_tags: bool = True):
+        """
+        :param client: (Client) The client used for fetching
+        :param max_depth: (int) Seeds are depth 0, nodes deeper than this are reported but not expanded
+        :param max_nodes_per_depth: (int, dict) Nodes fetched per depth, either one limit or {depth: limit}
+        :param max_fanout: (int) Maximum edges followed from a single node
+        :param concurrency: (int) Nodes fetched at the same time, each node makes its requests one after another
+        :param videos_per_profile: (int) Videos followed from a channel / pornstar (from the first listing page)
+        :param include_tags: (bool) Report tags as nodes and edges
+        """
+        self.client = client
+        self.max_depth = max_depth
+        self.max_nodes_per_depth = max_nodes_per_depth
+        self.max_fanout = max_fanout
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.videos_per_profile = videos_per_profile
+        self.include_tags = include_tags
+        self.visited: set[str] = set()
+
+    def _limit(self, depth: int) -> int:
+        if isinstance(self.max_nodes_per_depth, dict):
+            return self.max_nodes_per_depth.get(depth, 0)
+
+        return self.max_nodes_per_depth
+
+    async def _expand(self, pending: _Pending) -> Any:
+        async with self.semaphore:
+            if pending.kind == "video":
+                video = await self.client.get_video(pending.url)
+                author = video.author
+                pending.children.append(_Pending(node_id("channel", author.url), "channel", author.url))
+                for pornstar in video.pornstars:
+                    pending.children.append(_Pending(node_id("pornstar", pornstar.url), "pornstar", pornstar.url))
+
+                if self.include_tags:
+                    for tag in video.tags:
+                        pending.children.append(_Pending(node_id("tag", tag), "tag", None))
+
+                return video
+
+            if pending.kind == "pornstar":
+                profile = await self.client.get_pornstar(pending.url)
+
+            else:
+                profile = await self.client.get_channel(pending.url)
+
+            try:
+                worked_with = profile.worked_for_with
+
+            except AttributeError: # Profile has no "worked for / with" section
+                worked_with = []
+
+            for channel in worked_with:
+                pending.children.append(_Pending(node_id("channel", channel.url), "channel", channel.url))
+
+            if self.videos_per_profile:
+                # The first listing page is already cached by init(), the videos are fetched as nodes of their own
+                content = await self.client.core.fetch(f"{profile.url}/videos/best/0")
+                if isinstance(content, str): # A 404 / 204 Response means the profile has no video listing
+                    for url in extractor_account(content)[:self.videos_per_profile]:
+                        pending.children.append(_Pending(node_id("video", url), "video", url))
+
+            return profile
+
+    async def _expand_safe(self, pending: _Pending) -> tuple[_Pending, Any, Exception | None]:
+        try:
+            return pending, await self._expand(pending), None
+
+        except Exception as e:
+            return pending, None, e
+
+    @staticmethod
+    def _relation(source_kind: str, target_kind: str) -> str:
+        if source_kind == "video":
+            return {"channel": "uploaded_by", "pornstar": "features", "tag": "tagged"}[target_kind]
+
+        return "has_video" if target_kind == "video" else "worked_with"
+
+    def _admit(self, candidates: List[_Pending], limit: int | None) -> List[_Pending]:
+        # Nodes only count as visited once they made it into a level, the rest can still be reached from elsewhere
+        admitted = []
+        for pending in candidates:
+            if limit is not None and len(admitted) >= limit:
+                break
+
+            if pending.id not in self.visited:
+                self.visited.add(pending.id)
+                admitted.append(pending)
+
+        return admitted
+
+    async def crawl(self, seeds: List[str]) -> AsyncGenerator[GraphNode | GraphEdge, None]:
+        """
+        :param seeds: (list) Video, channel and / or pornstar URLs to start from
+        :return: (AsyncGenerator) GraphNode and GraphEdge objects in discovery order
+        """
+        candidates = []
+        for url in seeds:
+            kind = classify(url)
+            candidates.append(_Pending(node_id(kind, url), kind, url))
+
+        deferred: List[GraphEdge] = [] # Edges to nodes that were not admitted to a level yet
+        depth = 0
+        while True:
+            if depth > self.max_depth:
+                # Report what we found at the border, without fetching it
+                level = self._admit(candidates, None)
+                for pending in level:
+                    yield GraphNode(pending.id, pending.kind, pending.url, depth)
+
+            else:
+                level = self._admit(candidates, self._limit(depth))
+
+            for edge in deferred:
+                if edge.target in self.visited:
+                    yield edge
+
+            if depth > self.max_depth or not level:
+                return
+
+            candidates, deferred = [], []
+            tasks = [asyncio.ensure_future(self._expand_safe(pending)) for pending in level]
+            try:
+                for finished in asyncio.as_completed(tasks):
+                    pending, result, error = await finished
+                    yield GraphNode(pending.id, pending.kind, pending.url, depth, data=result,
+                                    error=repr(error) if error else None)
+
+                    for child in pending.children[:self.max_fanout]:
+                        edge = GraphEdge(pending.id, child.id, self._relation(pending.kind, child.kind))
+                        if child.kind == "tag" and child.id not in self.visited:
+                            self.visited.add(child.id)
+                            yield GraphNode(child.id, "tag", None, depth + 1)
+
+                        if child.id in self.visited:
+                            yield edge
+
+                        else:
+                            candidates.append(child)
+                            deferred.append(edge)
+
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            depth += 1
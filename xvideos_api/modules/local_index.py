@@ -0,0 +1,239 @@
+"""
+Offline full-text index over scraped video metadata (SQLite FTS5).
+
+Pass an index to the client with Client(local_index=LocalIndex("videos.db")) and every fully initialized Video is
+added (or updated) automatically. Client.search_local() then answers searches from the index without touching the
+network. The filters mirror the ones of Client.search(), except for the quality filter: the resolution isn't part of
+the watch page, so it isn't known offline.
+"""
+import re
+import time
+import json
+import sqlite3
+import threading
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from .consts import safe_attribute, url_slug, video_id_from_url
+from .sorting import Sort, SortDate, SortVideoTime
+
+
+REGEX_COUNT = re.compile(r'([\d.,]+)\s*([kKmMbB]?)')
+REGEX_DOT_THOUSANDS = re.compile(r'\d{1,3}(\.\d{3})+')
+REGEX_DURATION_PART = re.compile(r'(\d+)\s*(h|min|sec|s)\b')
+REGEX_QUERY_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+DATE_CUTOFF_DAYS = {
+    SortDate.Sort_last_3_days: 3,
+    SortDate.Sort_week: 7,
+    SortDate.Sort_month: 30,
+    SortDate.Sort_last_3_months: 90,
+    SortDate.Sort_last_6_months: 180,
+}
+
+DURATION_RANGES = { # In seconds, upper bound is exclusive
+    SortVideoTime.Sort_short: (60, 180),
+    SortVideoTime.Sort_middle: (180, 600),
+    SortVideoTime.Sort_long: (600, None),
+    SortVideoTime.Sort_long_10_20min: (600, 1200),
+    SortVideoTime.Sort_really_long: (1200, None),
+}
+
+ORDER_BY = {
+    Sort.Sort_relevance: "rank",
+    Sort.Sort_upload_date: "v.publish_date DESC",
+    Sort.Sort_rating: "v.rating DESC",
+    Sort.Sort_length: "v.duration DESC",
+    Sort.Sort_views: "v.views DESC",
+    Sort.Sort_random: "RANDOM()",
+}
+
+
+def parse_count(value: str | None) -> int | None:
+    """'1.2M' -> 1200000, '12,345' -> 12345, '3k' -> 3000, '12.5' -> 12"""
+    if not value:
+        return None
+
+    match = REGEX_COUNT.search(value)
+    if not match:
+        return None
+
+    number, unit = match.groups()
+    multiplier = {"k": 1_000, "m": 1_000_000, "b": 1_000_000_000}.get(unit.lower(), 1)
+    number = number.replace(",", "")
+    if not unit and REGEX_DOT_THOUSANDS.fullmatch(number): # '1.234.567', dots as thousands separators
+        number = number.replace(".", "")
+
+    try:
+        return int(float(number) * multiplier)
+
+    except ValueError:
+        return None
+
+
+def parse_date(value: str | None) -> str | None:
+    """
+    '2024-01-01T02:00:00+02:00' -> '2024-01-01T00:00:00+00:00'. Dates are stored as ISO-8601 in UTC, so comparing and
+    sorting them as text is the same as comparing them as dates. Dates without an offset are taken as UTC.
+    """
+    if not value:
+        return None
+
+    try:
+        date = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+
+    except ValueError:
+        return None
+
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return date.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def parse_duration(value: str | None) -> int | None:
+    """'1 h 5 min' -> 3900, '10 min' -> 600, '45 sec' -> 45"""
+    if not value:
+        return None
+
+    seconds = 0
+    for amount, unit in REGEX_DURATION_PART.findall(value):
+        seconds += int(amount) * {"h": 3600, "min": 60}.get(unit, 1)
+
+    return seconds or None
+
+
+class LocalIndex:
+    def __init__(self, path: str = "xvideos_index.db"):
+        """
+        :param path: (str) The database file, ":memory:" keeps the index in RAM
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False) # SyncClient calls in from its loop thread
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS videos (
+                id TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                title TEXT,
+                description TEXT,
+                tags TEXT,
+                uploader TEXT,
+                pornstars TEXT,
+                views INTEGER,
+                duration INTEGER,
+                likes INTEGER,
+                dislikes INTEGER,
+                rating REAL,
+                publish_date TEXT,
+                thumbnail_url TEXT,
+                indexed_at REAL NOT NULL
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS videos_fts USING fts5(
+                id UNINDEXED, title, description, tags, uploader, pornstars
+            );""")
+
+    def add_video(self, video) -> None:
+        """
+        Adds or updates a video. Fields that can't be read (e.g. on partially fetched pages) are stored as NULL and
+        never overwrite a value that is already indexed.
+
+        :param video: (Video) An initialized video
+        """
+        video_id = video_id_from_url(video.url) or video.url
+        tags = safe_attribute(video, "tags")
+        author = safe_attribute(video, "author")
+        pornstars = safe_attribute(video, "pornstars")
+        likes = parse_count(safe_attribute(video, "likes"))
+        dislikes = parse_count(safe_attribute(video, "dislikes"))
+        rating = likes / (likes + dislikes) if likes is not None and dislikes is not None and likes + dislikes else None
+        row = {
+            "id": video_id,
+            "url": video.url,
+            "title": safe_attribute(video, "title"),
+            "description": safe_attribute(video, "description"),
+            "tags": json.dumps(tags) if tags else None,
+            "uploader": url_slug(author.url) if author is not None else None,
+            "pornstars": json.dumps([url_slug(pornstar.url) for pornstar in pornstars]) if pornstars else None,
+            "views": parse_count(safe_attribute(video, "views")),
+            "duration": parse_duration(safe_attribute(video, "length")),
+            "likes": likes,
+            "dislikes": dislikes,
+            "rating": rating,
+            "publish_date": parse_date(safe_attribute(video, "publish_date")),
+            "thumbnail_url": safe_attribute(video, "thumbnail_url"),
+            "indexed_at": time.time(),
+        }
+
+        updates = ", ".join(f"{column} = COALESCE(excluded.{column}, {column})" for column in row if column != "id")
+        with self.lock, self.connection:
+            self.connection.execute(f"INSERT INTO videos ({', '.join(row)}) VALUES ({', '.join('?' for _ in row)}) "
+                                    f"ON CONFLICT (id) DO UPDATE SET {updates}", list(row.values()))
+            # The full-text row is rebuilt from the merged row, not from what this video happened to have
+            merged = self.connection.execute(
+                "SELECT title, description, tags, uploader, pornstars FROM videos WHERE id = ?", (video_id,)).fetchone()
+            self.connection.execute("DELETE FROM videos_fts WHERE id = ?", (video_id,))
+            self.connection.execute(
+                "INSERT INTO videos_fts (id, title, description, tags, uploader, pornstars) VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, merged["title"], merged["description"], " ".join(json.loads(merged["tags"] or "[]")),
+                 merged["uploader"], " ".join(json.loads(merged["pornstars"] or "[]"))))
+
+    def search_local(self, query: str, sorting_sort: str = Sort.Sort_relevance,
+                     sorting_date: str = SortDate.Sort_all, sorting_time: str = SortVideoTime.Sort_all,
+                     limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        :param query: (str) Words that all have to appear in title, description, tags, uploader or pornstars
+        :param sorting_sort: (str, Sort) Result order
+        :param sorting_date: (str, SortDate) Only videos published in this time frame
+        :param sorting_time: (str, SortVideoTime) Only videos in this duration bucket
+        :param limit: (int) Maximum number of results
+        :return: (list) The matching rows as dicts, tags and pornstars decoded to lists
+        """
+        conditions = []
+        parameters: List[Any] = []
+        tokens = REGEX_QUERY_TOKEN.findall(query)
+        if tokens:
+            conditions.append("videos_fts MATCH ?")
+            parameters.append(" ".join(f'"{token}"' for token in tokens))
+
+        if sorting_date in DATE_CUTOFF_DAYS:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=DATE_CUTOFF_DAYS[sorting_date])
+            conditions.append("v.publish_date >= ?")
+            parameters.append(cutoff.isoformat(timespec="seconds"))
+
+        if sorting_time in DURATION_RANGES:
+            lower, upper = DURATION_RANGES[sorting_time]
+            conditions.append("v.duration >= ?")
+            parameters.append(lower)
+            if upper is not None:
+                conditions.append("v.duration < ?")
+                parameters.append(upper)
+
+        order = ORDER_BY.get(sorting_sort, "rank")
+        if order == "rank" and not tokens:
+            order = "v.indexed_at DESC" # Nothing to rank without a query
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self.lock:
+            rows = self.connection.execute(f"""
+                SELECT v.* FROM videos_fts JOIN videos v ON v.id = videos_fts.id
+                {where} ORDER BY {order} LIMIT ?""", parameters + [limit]).fetchall()
+
+        results = []
+        for row in rows:
+            result = dict(row)
+            result["tags"] = json.loads(result["tags"] or "[]")
+            result["pornstars"] = json.loads(result["pornstars"] or "[]")
+            results.append(result)
+
+        return results
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+
+    def close(self) -> None:
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,242 @@
+"""
+Bulk thumbnail / preview clip fetcher with content addressed storage.
+
+Assets are stored as <root>/objects/<first two hex chars>/<sha256>.<ext>, so the same image reached through different
+URLs is only stored once. An SQLite index maps each URL to its object and ETag, which lets later runs skip assets
+that are already on disk (after an optional HEAD request to check that the ETag didn't change).
+
+    fetcher = MediaFetcher(client.core, root="media")
+    report = await fetcher.fetch_all(client.search("query", fields=["thumbnail_url", "preview_video_url"]))
+"""
+import os
+import time
+import sqlite3
+import asyncio
+import hashlib
+import logging
+import tempfile
+import threading
+
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from typing import Any, AsyncIterable, Iterable, List
+from base_api.base import BaseCore, setup_logger
+
+
+@dataclass
+class MediaFetchReport:
+    fetched: int = 0
+    skipped: int = 0
+    deduplicated: int = 0
+    failed: int = 0
+    bytes: int = 0 # Downloaded, including assets that turned out to be stored already
+    stored_bytes: int = 0 # Written to disk
+    elapsed: float = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Downloaded bytes per second"""
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def assets_per_second(self) -> float:
+        total = self.fetched + self.skipped + self.deduplicated
+        return total / self.elapsed if self.elapsed else 0.0
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+class MediaFetcher:
+    def __init__(self, core: BaseCore, root: str, concurrency: int = 8, thumbnails: bool = True,
+                 previews: bool = True, check_etag: bool = True):
+        """
+        :param core: (BaseCore) The core to download with, usually client.core so the session is shared
+        :param root: (str) Storage directory
+        :param concurrency: (int) Maximum downloads at the same time
+        :param thumbnails: (bool) Fetch thumbnail_url
+        :param previews: (bool) Fetch preview_video_url
+        :param check_etag: (bool) Send a HEAD request for known assets and refetch them if the ETag changed
+        """
+        self.core = core
+        self.root = root
+        self.concurrency = concurrency
+        self.thumbnails = thumbnails
+        self.previews = previews
+        self.check_etag = check_etag
+        self.logger = setup_logger(name="XVIDEOS API - [MediaFetcher]", log_file=None, level=logging.ERROR)
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self.lock = threading.Lock()
+        self.index = sqlite3.connect(os.path.join(root, "index.db"), check_same_thread=False) # Used from to_thread
+        self.index.execute("""
+            CREATE TABLE IF NOT EXISTS assets (
+                url TEXT PRIMARY KEY,
+                sha256 TEXT NOT NULL,
+                path TEXT NOT NULL,
+                etag TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )""")
+
+    def enable_logging(self, log_file: str | None = None, level: int | None = None, log_ip: str | None = None,
+                       log_port: int | None = None):
+        if not level:
+            level = logging.DEBUG
+        self.logger = setup_logger(name="XVIDEOS API - [MediaFetcher]", log_file=log_file, level=level,
+                                   http_ip=log_ip, http_port=log_port)
+
+    def _asset_urls(self, item: Any) -> List[str]:
+        """Accepts Video objects as well as plain dicts (e.g. listing records)"""
+        names = []
+        if self.thumbnails:
+            names.append("thumbnail_url")
+
+        if self.previews:
+            names.append("preview_video_url")
+
+        urls = []
+        for name in names:
+            try:
+                url = item.get(name) if isinstance(item, dict) else getattr(item, name)
+
+            except Exception as e: # A video without JSON-LD has no thumbnail, that's not fatal
+                self.logger.debug(f"No {name} for {item}: {e}")
+                continue
+
+            if url:
+                urls.append(url)
+
+        return urls
+
+    def object_path(self, digest: str, url: str) -> str:
+        extension = os.path.splitext(urlparse(url).path)[1] or ".bin"
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}{extension}")
+
+    def lookup(self, url: str) -> tuple[str, str | None] | None:
+        """
+        :return: (tuple) (path, etag) of the stored asset, or None if it isn't on disk
+        """
+        with self.lock:
+            row = self.index.execute("SELECT path, etag FROM assets WHERE url = ?", (url,)).fetchone()
+
+        if row is None or not os.path.exists(row[0]):
+            return None
+
+        return row[0], row[1]
+
+    async def fetch_asset(self, url: str, report: MediaFetchReport) -> str | None:
+        """
+        :return: (str) Path of the stored asset, raises if the download failed
+        """
+        known = await asyncio.to_thread(self.lookup, url)
+        if known is not None:
+            path, etag = known
+            if not (self.check_etag and etag):
+                report.skipped += 1
+                return path
+
+            head = await self.core.fetch(url, method="HEAD", get_response=True, save_cache=False)
+            if head.status_code == 200 and head.headers.get("etag") == etag:
+                report.skipped += 1
+                return path
+
+        response = await self.core.fetch(url, get_response=True, save_cache=False)
+        if response.status_code != 200:
+            raise ValueError(f"HTTP {response.status_code} for: {url}")
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        path = self.object_path(digest, url)
+        report.bytes += len(content)
+        if os.path.exists(path):
+            report.deduplicated += 1
+
+        else:
+            await asyncio.to_thread(self._write, path, content)
+            report.fetched += 1
+            report.stored_bytes += len(content)
+
+        await asyncio.to_thread(self._record, url, digest, path, response.headers.get("etag"), len(content))
+        return path
+
+    def _record(self, url: str, digest: str, path: str, etag: str | None, size: int) -> None:
+        with self.lock:
+            self.index.execute("INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?)",
+                               (url, digest, path, etag, size, time.time()))
+            self.index.commit()
+
+    @staticmethod
+    def _write(path: str, content: bytes) -> None:
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        # A unique temporary file per writer, two URLs with the same content can be written at the same time
+        descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".part")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(content)
+
+            os.replace(temporary, path) # Never leave a half written object behind
+
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    @staticmethod
+    async def _iterate(items: Iterable[Any] | AsyncIterable[Any]):
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                yield item
+
+        else:
+            for item in items:
+                yield item
+
+    async def fetch_all(self, items: Iterable[Any] | AsyncIterable[Any]) -> MediaFetchReport:
+        """
+        :param items: (iterable) Videos or dicts with thumbnail_url / preview_video_url, sync or async
+        :return: (MediaFetchReport) Counters and throughput of this run
+        """
+        report = MediaFetchReport()
+        started = time.perf_counter()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2) # Don't read the whole listing ahead
+        seen: set[str] = set()
+
+        async def worker() -> None:
+            while True:
+                url = await queue.get()
+                try:
+                    if url is None:
+                        return
+
+                    await self.fetch_asset(url, report)
+
+                except Exception as e:
+                    report.failed += 1
+                    self.logger.warning(f"Failed to fetch {url}: {e}")
+
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            async for item in self._iterate(items):
+                for url in self._asset_urls(item):
+                    if url not in seen:
+                        seen.add(url)
+                        await queue.put(url)
+
+            for _ in workers:
+                await queue.put(None)
+
+            await asyncio.gather(*workers)
+
+        finally:
+            for task in workers:
+                task.cancel()
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def close(self) -> None:
+        with self.lock:
+            self.index.close()
@@ -0,0 +1,345 @@
+"""
+Post-processing of finished downloads in a process pool.
+
+Remuxing MPEG-TS to MP4 and hashing multi-gigabyte files is CPU / disk bound. Doing it inline (Video.download with
+remux=True) blocks the download coroutine. PostProcessor takes finished downloads (their DownloadReport) through a
+bounded queue and works on them in worker processes while the downloads go on:
+
+    - remux to MP4 (PyAV, the conversion of BaseCore, with one core per worker process)
+    - verify the duration against the HLS playlist (needs PyAV to read the file)
+    - optionally compute a checksum
+
+    async with PostProcessor(max_workers=2, checksum="sha256", callback_progress=print, callback_remux=print) as post:
+        for video in videos:
+            await post.download(video, quality="best", path=f"{video.title}.mp4")
+    print(post.results)
+"""
+import os
+import time
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+
+from dataclasses import dataclass
+from urllib.parse import urljoin
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List
+
+import m3u8
+
+from base_api.base import BaseCore, setup_logger
+from base_api.modules.type_hints import DownloadReport
+
+
+@dataclass
+class PostProcessJob:
+    path: str
+    output: str
+    remux: bool
+    checksum: str | None
+    expected_duration: float | None
+    tolerance: float
+    ios_support: bool
+
+
+@dataclass
+class PostProcessResult:
+    path: str # The final file
+    status: str # "completed", "failed" or "skipped" (download wasn't complete)
+    duration: float | None = None
+    expected_duration: float | None = None
+    duration_ok: bool | None = None # None if it couldn't be checked
+    checksum: str | None = None
+    error: str | None = None
+    elapsed: float = 0.0
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+def probe_duration(path: str) -> float | None:
+    """Duration of a media file in seconds, None without PyAV or if the container doesn't tell"""
+    try:
+        import av # type: ignore[import-not-found]
+
+    except (ModuleNotFoundError, ImportError):
+        return None
+
+    with av.open(path) as container:
+        if container.duration:
+            return container.duration / av.time_base
+
+        stream = container.streams.video[0] if container.streams.video else None
+        if stream is not None and stream.duration and stream.time_base:
+            return float(stream.duration * stream.time_base)
+
+    return None
+
+
+_core: BaseCore | None = None # One per worker process, see init_worker()
+_progress: Any = None # Manager queue the remux progress goes back to the PostProcessor through
+
+
+def worker_core() -> BaseCore:
+    """The BaseCore of this process, built on first use"""
+    global _core
+    if _core is None:
+        _core = BaseCore()
+
+    return _core
+
+
+def init_worker(progress: Any = None) -> None:
+    """ProcessPoolExecutor initializer: builds the core once per worker process instead of once per job"""
+    global _progress
+    _progress = progress
+    worker_core()
+
+
+def remux_callback(path: str) -> Callable[[int, int], None] | None:
+    """Forwards the remux progress of one file, at most one update per percent to keep the IPC cheap"""
+    if _progress is None:
+        return None
+
+    last = [-1]
+
+    def callback(done: int, total: int) -> None:
+        percent = done * 100 // total if total else 100
+        if percent != last[0]:
+            last[0] = percent
+            _progress.put((path, done, total))
+
+    return callback
+
+
+def file_checksum(path: str, algorithm: str, chunk_size: int = 4 * 1024 * 1024) -> str:
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+
+    return digest.hexdigest()
+
+
+def run_job(job: PostProcessJob) -> PostProcessResult:
+    """Runs in a worker process"""
+    started = time.perf_counter()
+    result = PostProcessResult(path=job.output, status="completed", expected_duration=job.expected_duration)
+    try:
+        if job.remux:
+            temporary = f"{job.output}.remux.mp4"
+            worker_core()._convert_ts_to_mp4(job.path, temporary, remux_callback(job.output), job.ios_support)
+            os.replace(temporary, job.output)
+            if os.path.abspath(job.path) != os.path.abspath(job.output):
+                os.remove(job.path)
+
+        elif job.path != job.output:
+            os.replace(job.path, job.output)
+
+        if job.expected_duration is not None:
+            result.duration = probe_duration(job.output)
+            if result.duration is not None:
+                result.duration_ok = abs(result.duration - job.expected_duration) <= job.tolerance
+                if not result.duration_ok:
+                    result.status = "failed"
+                    result.error = f"Duration {result.duration:.1f}s, playlist says {job.expected_duration:.1f}s"
+
+        if job.checksum:
+            result.checksum = file_checksum(job.output, job.checksum)
+
+    except Exception as e:
+        result.status = "failed"
+        result.error = repr(e)
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+async def playlist_duration(core: BaseCore, master_url: str, quality, start_segment: int = 0) -> float:
+    """Sum of the EXTINF durations of the variant that was downloaded, from start_segment on"""
+    playlist_url = await core.get_m3u8_by_quality(m3u8_url=master_url, quality=quality)
+    playlist = m3u8.loads(await core.fetch(playlist_url, save_cache=False))
+    if playlist.is_variant: # Same fallback as BaseCore.get_segments
+        playlist_url = urljoin(playlist_url, playlist.playlists[0].uri)
+        playlist = m3u8.loads(await core.fetch(playlist_url, save_cache=False))
+
+    return sum(segment.duration or 0.0 for segment in playlist.segments[start_segment:])
+
+
+class PostProcessor:
+    def __init__(self, max_workers: int | None = None, queue_size: int = 8, remux: bool = True,
+                 verify_duration: bool = True, checksum: str | None = None, tolerance: float = 2.0,
+                 ios_support: bool = False, callback_progress: Callable[[int, int], None] | None = None,
+                 callback_remux: Callable[[str, int, int], None] | None = None):
+        """
+        :param max_workers: (int) Worker processes, defaults to the number of CPUs
+        :param queue_size: (int) Finished downloads waiting for a worker before submit() blocks
+        :param remux: (bool) Remux MPEG-TS to MP4
+        :param verify_duration: (bool) Compare the file duration with the HLS playlist (needs the video in submit())
+        :param checksum: (str) hashlib algorithm, e.g. "sha256", None for no checksum
+        :param tolerance: (float) Allowed duration difference in seconds
+        :param ios_support: (bool) Transcode audio that iOS can't play in MP4 (see BaseCore._convert_ts_to_mp4)
+        :param callback_progress: (callable) Called with (finished, submitted) files whenever a file is done
+        :param callback_remux: (callable) Progress of every remux, called with (path, done, total) on the event loop.
+                               Like callback_remux of Video.download, plus the path as jobs run side by side
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.remux = remux
+        self.verify_duration = verify_duration
+        self.checksum = checksum
+        self.tolerance = tolerance
+        self.ios_support = ios_support
+        self.callback_progress = callback_progress
+        self.callback_remux = callback_remux
+        self.results: List[PostProcessResult] = []
+        self.submitted = 0
+        self.finished = 0
+        self.logger = setup_logger(name="XVIDEOS API - [PostProcessor]", log_file=None, level=logging.ERROR)
+        self.executor: ProcessPoolExecutor | None = None
+        self.manager: Any = None
+        self.progress: Any = None
+        self.progress_task: asyncio.Task | None = None
+        self.queue: asyncio.Queue | None = None
+        self.workers: List[asyncio.Task] = []
+
+    def enable_logging(self, log_file: str | None = None, level: int | None = None, log_ip: str | None = None,
+                       log_port: int | None = None):
+        if not level:
+            level = logging.DEBUG
+        self.logger = setup_logger(name="XVIDEOS API - [PostProcessor]", log_file=log_file, level=level,
+                                   http_ip=log_ip, http_port=log_port)
+
+    async def start(self) -> None:
+        if self.executor is not None:
+            return
+
+        if self.callback_remux is not None:
+            self.manager = multiprocessing.Manager()
+            self.progress = self.manager.Queue()
+            self.progress_task = asyncio.ensure_future(self._forward_progress())
+
+        self.executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=init_worker,
+                                            initargs=(self.progress,))
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.workers = [asyncio.ensure_future(self._worker()) for _ in range(self.max_workers)]
+
+    async def _worker(self) -> None:
+        assert self.queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            try:
+                if job is None:
+                    return
+
+                result = await loop.run_in_executor(self.executor, run_job, job)
+                self._finish(result)
+
+            except Exception as e:
+                self._finish(PostProcessResult(path=job.output, status="failed", error=repr(e)))
+
+            finally:
+                self.queue.task_done()
+
+    async def _forward_progress(self) -> None:
+        assert self.callback_remux is not None
+        while True:
+            update = await asyncio.to_thread(self.progress.get)
+            if update is None:
+                return
+
+            try:
+                self.callback_remux(*update)
+
+            except Exception as e:
+                self.logger.warning(f"callback_remux failed: {e}")
+
+    def _finish(self, result: PostProcessResult) -> None:
+        self.results.append(result)
+        self.finished += 1
+        if result.error:
+            self.logger.warning(f"Post-processing {result.path} failed: {result.error}")
+
+        if self.callback_progress:
+            self.callback_progress(self.finished, self.submitted)
+
+    async def submit(self, report: DownloadReport | bool, path: str, video=None, output: str | None = None) -> None:
+        """
+        Queues a finished download. Waits while the queue is full, which slows the downloads down to the speed of
+        the post-processing instead of piling up unprocessed files.
+
+        :param report: (DownloadReport) The report of Video.download(..., return_report=True)
+        :param path: (str) The downloaded file
+        :param video: (Video) Needed for the duration check, the playlist is read from video.m3u8_base_url
+        :param output: (str) Where the result goes, defaults to `path`
+        """
+        await self.start()
+        assert self.queue is not None
+        self.submitted += 1
+        completed = report is True or (isinstance(report, DownloadReport) and report.status == "completed")
+        if not completed:
+            self._finish(PostProcessResult(path=path, status="skipped",
+                                           error=f"Download not completed: {getattr(report, 'status', report)}"))
+            return
+
+        expected = None
+        if self.verify_duration and video is not None and isinstance(report, DownloadReport):
+            try:
+                expected = await playlist_duration(video.core, video.m3u8_base_url, report.quality,
+                                                   report.start_segment)
+
+            except Exception as e:
+                self.logger.warning(f"Couldn't read the playlist duration of {path}: {e}")
+
+        await self.queue.put(PostProcessJob(path=path, output=output or path, remux=self.remux,
+                                            checksum=self.checksum, expected_duration=expected,
+                                            tolerance=self.tolerance, ios_support=self.ios_support))
+
+    async def download(self, video, quality, path: str, **kwargs) -> DownloadReport | bool:
+        """Video.download(no_title=True, remux=False, return_report=True) followed by submit()"""
+        report = await video.download(quality=quality, path=path, no_title=True, remux=False, return_report=True,
+                                      **kwargs)
+        await self.submit(report, path, video=video)
+        return report
+
+    async def join(self) -> List[PostProcessResult]:
+        """Waits until every queued file is processed"""
+        if self.queue is not None:
+            await self.queue.join()
+
+        return self.results
+
+    async def close(self) -> None:
+        if self.executor is None:
+            return
+
+        await self.join()
+        assert self.queue is not None
+        for _ in self.workers:
+            await self.queue.put(None)
+
+        await asyncio.gather(*self.workers)
+        self.executor.shutdown()
+        self.executor = None
+        if self.progress_task is not None:
+            self.progress.put(None) # Every update of the workers is queued before this
+            await self.progress_task
+            self.manager.shutdown()
+            self.manager = self.progress = self.progress_task = None
+
+    async def __aenter__(self) -> "PostProcessor":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def stats(self) -> Dict[str, int]:
+        statuses: Dict[str, int] = {}
+        for result in self.results:
+            statuses[result.status] = statuses.get(result.status, 0) + 1
+
+        return {"submitted": self.submitted, "finished": self.finished,
+                "pending": self.submitted - self.finished, **statuses}
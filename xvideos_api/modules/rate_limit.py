@@ -0,0 +1,170 @@
+"""
+Host-wide rate limiting shared by all worker processes.
+
+Every endpoint class (watch pages, listings, profiles, CDN segments / playlists) has a token bucket stored in a small
+SQLite database. All processes that open the same file share the buckets, so 16 workers together stay within the
+configured rate instead of each of them doing so individually. A request takes a token in one short transaction. If
+the bucket is empty, the token is reserved anyway and the caller sleeps until it is due, so waiting requests are
+served in order without polling the database.
+
+    limiter = HostRateLimiter("/tmp/xvideos_rate.db", rates={"watch": (2, 4)})
+    client = Client(rate_limiter=limiter) # Applies to page fetches, listings and HLS downloads of this client
+"""
+import os
+import time
+import sqlite3
+import asyncio
+import inspect
+import logging
+import tempfile
+import threading
+
+from functools import wraps
+from urllib.parse import urlparse
+from typing import Dict, Tuple
+from base_api.base import BaseCore, setup_logger
+
+from .consts import REGEX_VIDEO_CHECK_URL
+
+
+DEFAULT_RATES: Dict[str, Tuple[float, float]] = { # Endpoint class: (tokens per second, burst)
+    "watch": (2.0, 4.0),
+    "listing": (1.0, 3.0),
+    "profile": (1.0, 3.0),
+    "cdn": (100.0, 200.0),
+}
+
+PROFILE_PATHS = ("/channels/", "/pornstars/", "/profiles/", "/model-channels/", "/amateur-channels/", "/models/")
+CDN_EXTENSIONS = (".ts", ".m3u8", ".mp4", ".jpg", ".jpeg", ".png", ".webp", ".m4s")
+
+
+def classify_url(url: str) -> str:
+    """Maps a URL to its endpoint class: "watch", "listing", "profile" or "cdn" """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if not host.endswith("xvideos.com") or host.startswith(("cdn", "hls", "thumb", "img")) \
+            or parsed.path.lower().endswith(CDN_EXTENSIONS):
+        return "cdn"
+
+    if REGEX_VIDEO_CHECK_URL.match(url):
+        return "watch"
+
+    if parsed.path.lower().startswith(PROFILE_PATHS):
+        return "profile"
+
+    return "listing"
+
+
+class HostRateLimiter:
+    def __init__(self, path: str | None = None, rates: Dict[str, Tuple[float, float]] | None = None,
+                 timeout: float = 30.0):
+        """
+        :param path: (str) Database shared by all processes on the host, defaults to a file in the temp directory
+        :param rates: (dict) {endpoint class: (tokens per second, burst)}, merged over DEFAULT_RATES.
+                      All processes should use the same rates, the last one to start wins.
+        :param timeout: (float) Seconds to wait for the database lock
+        """
+        self.path = path or os.path.join(tempfile.gettempdir(), "xvideos_api_rate_limit.db")
+        self.rates = {**DEFAULT_RATES, **(rates or {})}
+        self.lock = threading.Lock()
+        self.logger = setup_logger(name="XVIDEOS API - [HostRateLimiter]", log_file=None, level=logging.ERROR)
+        self.counters = {name: {"requests": 0, "throttled": 0, "waited": 0.0} for name in self.rates}
+        self.connection = sqlite3.connect(self.path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            )""")
+
+    def enable_logging(self, log_file: str | None = None, level: int | None = None, log_ip: str | None = None,
+                       log_port: int | None = None):
+        if not level:
+            level = logging.DEBUG
+        self.logger = setup_logger(name="XVIDEOS API - [HostRateLimiter]", log_file=log_file, level=level,
+                                   http_ip=log_ip, http_port=log_port)
+
+    def reserve(self, name: str, tokens: float = 1.0) -> float:
+        """
+        Takes `tokens` from the bucket of `name`.
+
+        :return: (float) Seconds the caller has to wait before sending the request, 0.0 if it may go right away
+        """
+        if name not in self.rates:
+            return 0.0
+
+        rate, burst = self.rates[name]
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE") # Serializes the read-modify-write across processes
+            try:
+                now = time.time() # Wall clock, the only clock all processes agree on
+                row = self.connection.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (name,)).fetchone()
+                available = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+                # Going below zero reserves a future token, later callers queue up behind it
+                available -= tokens
+                self.connection.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                                        (name, available, now))
+                self.connection.execute("COMMIT")
+
+            except BaseException:
+                self.connection.execute("ROLLBACK")
+                raise
+
+            wait = -available / rate if available < 0 else 0.0
+            counters = self.counters[name]
+            counters["requests"] += 1
+            if wait:
+                counters["throttled"] += 1
+                counters["waited"] += wait
+
+        if wait:
+            self.logger.debug(f"Throttling {name} request for {wait:.3f}s")
+
+        return wait
+
+    async def acquire(self, name: str, tokens: float = 1.0) -> float:
+        """Waits until a request of class `name` may be sent. Returns the seconds waited."""
+        wait = await asyncio.to_thread(self.reserve, name, tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+        return wait
+
+    async def acquire_url(self, url: str) -> float:
+        return await self.acquire(classify_url(url))
+
+    def install(self, core: BaseCore) -> BaseCore:
+        """
+        Makes every core.fetch() of this core wait for its bucket first. That covers page fetches, listings, HLS
+        playlists and segments. Cache hits don't use a token.
+        """
+        if getattr(core, "rate_limiter", None) is self:
+            return core
+
+        core.rate_limiter = self
+        fetch = core.fetch
+        signature = inspect.signature(fetch)
+
+        @wraps(fetch)
+        async def limited_fetch(url: str, *args, **kwargs):
+            # Bound against the real signature, so positional and keyword arguments are read the same way
+            arguments = signature.bind_partial(url, *args, **kwargs).arguments
+            for parameter in signature.parameters.values():
+                if parameter.kind is parameter.VAR_KEYWORD: # Wrapping cores take fetch(url, *args, **kwargs)
+                    arguments.update(arguments.pop(parameter.name, {}))
+
+            if arguments.get("get_bytes") or arguments.get("get_response") or core.cache.handle_cache(url) is None:
+                await self.acquire_url(url)
+
+            return await fetch(url, *args, **kwargs)
+
+        core.fetch = limited_fetch
+        return core
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Requests, throttled requests and seconds waited per endpoint class, for this process"""
+        return {name: dict(counters) for name, counters in self.counters.items()}
+
+    def close(self) -> None:
+        self.connection.close()
@@ -0,0 +1,214 @@
+"""
+HTTP record / replay for deterministic benchmarks and offline tests.
+
+RecordingCore is a BaseCore that stores every response it fetches (pages, JSON, m3u8 playlists and segments, i.e.
+everything that goes through core.fetch) in a compact SQLite archive with zlib compressed bodies. ReplayCore answers
+the same requests from that archive without touching the network, optionally shaped with a fixed latency and a
+shared bandwidth limit, so runs are repeatable and comparable.
+
+    client = Client(core=RecordingCore(HttpArchive("session.har.db")))
+    ...  # use the client as usual
+    client = Client(core=ReplayCore(HttpArchive("session.har.db"), latency=0.05, bandwidth=2 * 1024 * 1024))
+"""
+import json
+import zlib
+import time
+import random
+import sqlite3
+import asyncio
+import threading
+
+from urllib.parse import urlencode
+from typing import Any, Dict, Tuple
+from curl_cffi.requests import Response
+from base_api.base import BaseCore
+from base_api.modules.config import RuntimeConfig, config
+
+from .errors import ReplayMiss
+
+
+KEPT_HEADERS = ("content-type", "content-length", "etag", "last-modified", "location")
+
+
+def request_key(url: str, params: Dict[str, Any] | None = None) -> str:
+    if not params:
+        return url
+
+    return f"{url}{'&' if '?' in url else '?'}{urlencode(params)}"
+
+
+class HttpArchive:
+    def __init__(self, path: str = "xvideos_archive.db", compression_level: int = 6):
+        """
+        :param path: (str) The archive file, ":memory:" keeps it in RAM
+        :param compression_level: (int) zlib level for the stored bodies
+        """
+        self.path = path
+        self.compression_level = compression_level
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS exchanges (
+                method TEXT NOT NULL,
+                url TEXT NOT NULL,
+                status INTEGER NOT NULL,
+                headers TEXT NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                recorded_at REAL NOT NULL,
+                PRIMARY KEY (method, url)
+            )""")
+
+    def put(self, method: str, url: str, status: int, headers: Dict[str, str], body: bytes) -> None:
+        """Stores (or replaces) one exchange. Only headers the library looks at are kept."""
+        kept = {name: value for name, value in headers.items() if name.lower() in KEPT_HEADERS}
+        with self.lock, self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO exchanges VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    (method.upper(), url, status, json.dumps(kept),
+                                     zlib.compress(body, self.compression_level), len(body), time.time()))
+
+    def get(self, method: str, url: str) -> Tuple[int, Dict[str, str], bytes] | None:
+        """
+        :return: (tuple) (status, headers, body) or None if the exchange wasn't recorded
+        """
+        with self.lock:
+            row = self.connection.execute("SELECT status, headers, body FROM exchanges WHERE method = ? AND url = ?",
+                                          (method.upper(), url)).fetchone()
+
+        if row is None:
+            return None
+
+        return row[0], json.loads(row[1]), zlib.decompress(row[2])
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            count, size, stored = self.connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM exchanges").fetchone()
+
+        return {"exchanges": count, "bytes": size, "stored_bytes": stored}
+
+    def __len__(self) -> int:
+        return self.stats()["exchanges"]
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def _deliver(core: BaseCore, url: str, response: Response, get_bytes: bool, get_response: bool,
+             save_cache: bool) -> bytes | str | Response:
+    """Turns a response into what BaseCore.fetch would have returned for the same flags"""
+    if get_response or response.status_code != 200:
+        return response # BaseCore returns 204 / 404 responses as they are
+
+    if get_bytes:
+        return response.content
+
+    encoding = getattr(response, "encoding", None) or "utf-8"
+    try:
+        content = response.content.decode(encoding, errors="strict")
+
+    except UnicodeDecodeError:
+        content = response.content.decode("latin1", errors="replace")
+
+    if save_cache:
+        core.cache.save_cache(url, content)
+
+    return content
+
+
+class RecordingCore(BaseCore):
+    """A BaseCore that writes every fetched response into an HttpArchive"""
+    supports_streaming = False # Streamed reads stop early, the archive needs the complete pages
+
+    def __init__(self, archive: HttpArchive, configuration: RuntimeConfig = config):
+        super().__init__(configuration=configuration)
+        self.archive = archive
+
+    async def fetch(self, url: str, get_bytes: bool = False, timeout: int | None = None, get_response: bool = False,
+                    save_cache: bool = True, cookies: Dict[str, str] | None = None, allow_redirects: bool = True,
+                    data: Dict[str, Any] | None = None, method: str = "GET", headers: Dict[str, str] | None = None,
+                    json_data: Dict[str, Any] | None = None, params: Dict[str, Any] | None = None):
+        if not get_bytes and not get_response:
+            cache_hit = self.cache.handle_cache(url)
+            if cache_hit is not None:
+                return cache_hit
+
+        response = await super().fetch(url, get_bytes=get_bytes, timeout=timeout, get_response=True,
+                                       save_cache=False, cookies=cookies, allow_redirects=allow_redirects, data=data,
+                                       method=method, headers=headers, json_data=json_data, params=params)
+        await asyncio.to_thread(self.archive.put, method, request_key(url, params), response.status_code,
+                                dict(response.headers), response.content or b"")
+        return _deliver(self, url, response, get_bytes, get_response, save_cache)
+
+
+class ReplayCore(BaseCore):
+    """A BaseCore that answers every request from an HttpArchive, nothing goes over the network"""
+    supports_streaming = False
+
+    def __init__(self, archive: HttpArchive, latency: float = 0.0, bandwidth: float | None = None,
+                 jitter: float = 0.0, seed: int | None = 0, configuration: RuntimeConfig = config):
+        """
+        :param archive: (HttpArchive) A recorded archive
+        :param latency: (float) Seconds added to every response (time to first byte)
+        :param bandwidth: (float) Bytes per second shared by all requests of this core, None for unlimited
+        :param jitter: (float) Random extra latency between 0 and `jitter` seconds
+        :param seed: (int) Seed for the jitter, the same seed gives the same delays
+        """
+        super().__init__(configuration=configuration)
+        self.archive = archive
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self._link_free_at = 0.0 # When the simulated link finishes its current transfers
+        self.hits = 0
+        self.misses = 0
+
+    def initialize_session(self) -> None:
+        pass # Nothing to connect to
+
+    async def _shape(self, size: int) -> None:
+        loop = asyncio.get_running_loop()
+        delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if self.bandwidth:
+            # Transfers queue up on one link, like concurrent downloads over the same connection
+            start = max(loop.time() + delay, self._link_free_at)
+            self._link_free_at = start + size / self.bandwidth
+            delay = self._link_free_at - loop.time()
+
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def fetch(self, url: str, get_bytes: bool = False, timeout: int | None = None, get_response: bool = False,
+                    save_cache: bool = True, cookies: Dict[str, str] | None = None, allow_redirects: bool = True,
+                    data: Dict[str, Any] | None = None, method: str = "GET", headers: Dict[str, str] | None = None,
+                    json_data: Dict[str, Any] | None = None, params: Dict[str, Any] | None = None):
+        if not get_bytes and not get_response:
+            cache_hit = self.cache.handle_cache(url)
+            if cache_hit is not None:
+                return cache_hit
+
+        key = request_key(url, params)
+        entry = self.archive.get(method, key)
+        if entry is None and method.upper() == "HEAD":
+            entry = self.archive.get("GET", key) # A recorded GET answers a HEAD just as well
+
+        if entry is None:
+            self.misses += 1
+            raise ReplayMiss(f"No recorded response for: {method} {key}")
+
+        status, recorded_headers, body = entry
+        if method.upper() == "HEAD":
+            body = b""
+
+        await self._shape(len(body))
+        response = Response()
+        response.url = key
+        response.status_code = status
+        response.content = body
+        for name, value in recorded_headers.items():
+            response.headers[name] = value
+
+        self.hits += 1
+        self.total_requests += 1
+        return _deliver(self, url, response, get_bytes, get_response, save_cache)
@@ -0,0 +1,301 @@
+"""
+Policy driven resilience around core.fetch.
+
+Attach a ResiliencePolicy with Client(resilience=ResiliencePolicy(...)) or `policy.install(core)`. Every request of
+that core (video pages, listing pages walked by the listing generators, streamed pages and HLS requests) then gets:
+
+- retries per error class with jittered exponential backoff
+- a retry budget, so a failing upstream isn't hammered with retries
+- optional hedging, a duplicate request is started if the first one is slower than `hedge_after`
+- a circuit breaker that pauses all requests of the client after a burst of bot detections (403 / 429 responses and
+  challenge pages)
+"""
+import time
+import random
+import asyncio
+
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, Type
+from base_api.base import BaseCore
+from curl_cffi.requests import RequestsError
+from base_api.modules.errors import BotProtectionDetected, InvalidProxy, NetworkingError, UnknownError
+
+from .consts import REGEX_VIDEO_CHECK_URL, REGEX_CHALLENGE
+from .errors import NetworkError, ProxyError, BotDetection, UnknownNetworkError
+from .streaming import stream_page
+
+BOT_BLOCK_STATUS = (403, 429)
+
+# Errors of BaseCore.fetch and the error classes of this package they correspond to
+ERROR_KINDS: Dict[Type[Exception], Type[Exception]] = {
+    BotProtectionDetected: BotDetection,
+    InvalidProxy: ProxyError,
+    NetworkingError: NetworkError,
+    RequestsError: NetworkError,
+    UnknownError: UnknownNetworkError,
+}
+
+
+def is_bot_block(error: BaseException | None) -> bool:
+    """True for bot protection, 403 and 429, however BaseCore.fetch ended up reporting them"""
+    # BaseCore.fetch wraps some of its own errors (e.g. "403 User-Agent Switch") into UnknownError, so follow the chain
+    while error is not None:
+        if isinstance(error, (BotProtectionDetected, BotDetection)):
+            return True
+
+        status = getattr(getattr(error, "response", None), "status_code", None)
+        if status in BOT_BLOCK_STATUS:
+            return True
+
+        if isinstance(error, NetworkingError) and str(error).startswith(("HTTP 403", "HTTP 429", "403 ", "429")):
+            return True
+
+        error = error.__cause__
+
+    return False
+
+
+def is_challenge(content: Any) -> bool:
+    """True if a page that came back as 200 is a bot challenge instead of the requested page"""
+    return isinstance(content, str) and REGEX_CHALLENGE.search(content, 0, 8192) is not None
+
+
+def error_kind(error: Exception) -> Type[Exception]:
+    """The error class of this package that `error` counts as for retries"""
+    if is_bot_block(error):
+        return BotDetection
+
+    for error_class, kind in ERROR_KINDS.items():
+        if isinstance(error, error_class):
+            return kind
+
+    return type(error)
+
+
+class RetryPolicy:
+    def __init__(self, attempts: Dict[Type[Exception], int] | None = None, base_delay: float = 0.5,
+                 max_delay: float = 20.0):
+        """
+        :param attempts: (dict) Maximum attempts per exception class, exceptions not listed are never retried
+        :param base_delay: (float) Backoff base in seconds
+        :param max_delay: (float) Upper bound for a single backoff in seconds
+        """
+        self.attempts = attempts if attempts is not None else {
+            NetworkError: 4,
+            UnknownNetworkError: 3,
+            ProxyError: 2,
+            BotDetection: 2,
+        }
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def max_attempts(self, error: Exception) -> int:
+        kind = error_kind(error)
+        for error_class, attempts in self.attempts.items():
+            if issubclass(kind, error_class) or isinstance(error, error_class):
+                return attempts
+
+        return 1
+
+    def delay(self, attempt: int) -> float:
+        """Full jitter backoff, see https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class RetryBudget:
+    def __init__(self, ratio: float = 0.2, min_retries: int = 10):
+        """
+        :param ratio: (float) Retries that are earned per successful first attempt
+        :param min_retries: (int) Retries that are always available, also the starting balance
+        """
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.balance = float(min_retries)
+        self.max_balance = float(min_retries) * 10
+
+    def deposit(self) -> None:
+        self.balance = min(self.max_balance, self.balance + self.ratio)
+
+    def withdraw(self, cost: float = 1.0) -> bool:
+        """
+        :param cost: (float) Requests the retry can cause, one policy retry of core.fetch is up to max_retries
+        """
+        if self.balance < cost:
+            return False
+
+        self.balance -= cost
+        return True
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = 5, window: float = 60.0, cooldown: float = 120.0):
+        """
+        :param threshold: (int) Bot detections within `window` seconds that open the breaker
+        :param window: (float) Sliding window in seconds
+        :param cooldown: (float) How long the breaker stays open
+        """
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.events: list[float] = []
+        self.open_until = 0.0
+        self.trips = 0
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self.open_until
+
+    def record(self) -> None:
+        now = time.monotonic()
+        self.events = [event for event in self.events if now - event < self.window]
+        self.events.append(now)
+        if len(self.events) >= self.threshold and not self.is_open:
+            self.open_until = now + self.cooldown
+            self.events.clear()
+            self.trips += 1
+
+    async def wait(self) -> float:
+        """Blocks while the breaker is open, returns the time waited"""
+        waited = 0.0
+        while self.is_open:
+            remaining = self.open_until - time.monotonic()
+            await asyncio.sleep(remaining)
+            waited += remaining
+
+        return waited
+
+
+class ResiliencePolicy:
+    def __init__(self, retry: RetryPolicy | None = None, budget: RetryBudget | None = None,
+                 breaker: CircuitBreaker | None = None, hedge_after: float | None = None,
+                 hedge_filter: Callable[[str], bool] | None = None):
+        """
+        :param retry: (RetryPolicy) Attempts and backoff per error class
+        :param budget: (RetryBudget) Shared retry budget, None disables the budget
+        :param breaker: (CircuitBreaker) Breaker for bot detections, None disables it
+        :param hedge_after: (float) Seconds after which a duplicate request is started, None disables hedging
+        :param hedge_filter: (callable) Decides which URLs may be hedged, defaults to video watch pages
+        """
+        self.retry = retry or RetryPolicy()
+        self.budget = budget
+        self.breaker = breaker
+        self.hedge_after = hedge_after
+        self.hedge_filter = hedge_filter or (lambda url: bool(REGEX_VIDEO_CHECK_URL.match(url)))
+        self.stats = {"requests": 0, "retries": 0, "budget_exhausted": 0, "hedges": 0, "hedge_wins": 0,
+                      "breaker_waits": 0, "breaker_wait_time": 0.0, "bot_blocks": 0}
+
+    def install(self, core: BaseCore) -> BaseCore:
+        """
+        Runs every core.fetch() and core.stream() of this core through the policy, which covers page fetches, the
+        listing pages and video pages of the listing generators, streamed pages and HLS requests.
+
+        BaseCore.fetch already retries network errors by itself up to configuration.max_retries times, so a retry
+        of the policy costs that many requests of the retry budget.
+        """
+        if getattr(core, "resilience", None) is self:
+            return core
+
+        core.resilience = self
+        configuration = getattr(core, "configuration", None)
+        cost = max(1, int(getattr(configuration, "max_retries", 1)))
+        fetch = core.fetch
+        stream = getattr(core, "stream", None) or (lambda *args, **kwargs: stream_page(core, *args, **kwargs))
+
+        @wraps(fetch)
+        async def resilient_fetch(url: str, *args, **kwargs):
+            return await self.run(lambda: self.checked(fetch(url, *args, **kwargs), url), url=url, cost=cost)
+
+        async def resilient_stream(url: str, markers: list, chunk_size: int = 16384):
+            return await self.run(lambda: self.checked(stream(url, markers, chunk_size=chunk_size), url), url=url,
+                                  cost=cost)
+
+        core.fetch = resilient_fetch
+        core.stream = resilient_stream
+        return core
+
+    async def checked(self, request: Awaitable[Any], url: str) -> Any:
+        """Awaits one attempt and reports bot blocks (403 / 429 / challenge pages) as BotDetection"""
+        try:
+            result = await request
+
+        except Exception as e:
+            if is_bot_block(e) and not isinstance(e, BotDetection):
+                self.stats["bot_blocks"] += 1
+                raise BotDetection(f"Blocked while fetching {url}: {e}") from e
+
+            raise
+
+        if is_challenge(result):
+            self.stats["bot_blocks"] += 1
+            raise BotDetection(f"Challenge page served for: {url}")
+
+        return result
+
+    async def run(self, call: Callable[[], Awaitable[Any]], url: str, cost: float = 1.0) -> Any:
+        """
+        :param call: (callable) Creates a fresh request coroutine for each attempt
+        :param url: (str) The URL, used for the hedge filter
+        :param cost: (float) Budget a retry uses up, see install()
+        """
+        self.stats["requests"] += 1
+        attempt = 0
+        while True:
+            if self.breaker is not None and self.breaker.is_open:
+                self.stats["breaker_waits"] += 1
+                self.stats["breaker_wait_time"] += await self.breaker.wait()
+
+            try:
+                if self.hedge_after is not None and self.hedge_filter(url):
+                    result = await self._hedged(call)
+
+                else:
+                    result = await call()
+
+                if attempt == 0 and self.budget is not None:
+                    self.budget.deposit()
+
+                return result
+
+            except Exception as e:
+                if isinstance(e, BotDetection) and self.breaker is not None:
+                    self.breaker.record()
+
+                attempt += 1
+                if attempt >= self.retry.max_attempts(e):
+                    raise
+
+                if self.budget is not None and not self.budget.withdraw(cost):
+                    self.stats["budget_exhausted"] += 1
+                    raise
+
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.retry.delay(attempt))
+
+    async def _hedged(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        first = asyncio.ensure_future(call())
+        pending = {first}
+        error: BaseException | None = None
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_after)
+            if done:
+                return first.result()
+
+            self.stats["hedges"] += 1
+            second = asyncio.ensure_future(call())
+            pending = {first, second}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.stats["hedge_wins"] += 1
+
+                        return task.result()
+
+                    error = task.exception()
+
+            raise error
+
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,75 @@
+"""
+Streaming page fetches.
+
+`stream_page` reads a page over the session of a core and stops as soon as every marker matched. It behaves like
+BaseCore.fetch where it can: same headers, cookies and request delay, a 404 returns the Response and every other
+status raises NetworkingError, so callers handle both paths the same way.
+
+Cores that route or limit their requests (ScopedCore, PooledCore) provide a `stream(url, markers, chunk_size)`
+coroutine built on top of it, `stream_html_content` always goes through that hook when it exists.
+"""
+import codecs
+
+from base_api.base import BaseCore
+from curl_cffi.requests import RequestsError
+from base_api.modules.errors import InvalidProxy, NetworkingError
+
+
+async def stream_page(core: BaseCore, url: str, markers: list, chunk_size: int = 16384):
+    """
+    :param core: (BaseCore) The core whose session, headers and cookies are used
+    :param url: (str) The page
+    :param markers: (list) Compiled regexes, reading stops once all of them matched
+    :param chunk_size: (int) Characters before each new chunk that are searched again (curl picks the read size)
+    :return: (str) The decoded prefix that was read, or the Response for a 404
+    """
+    if core.session is None:
+        core.initialize_session()
+
+    await core.enforce_delay()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = list(markers)
+    scanned = 0
+    content = ""
+    try:
+        response = await core.session.request("GET", url, stream=True, timeout=core.configuration.timeout,
+                                              headers=core._merged_headers(None),
+                                              cookies=core._merged_cookies(None))
+
+    except RequestsError as e:
+        if "proxy" in str(e).lower():
+            raise InvalidProxy("Proxy error when trying a request, aborting!") from e
+
+        raise
+
+    try:
+        core.total_requests += 1
+        if response.status_code == 404:
+            return response
+
+        if response.status_code != 200:
+            raise NetworkingError(f"HTTP {response.status_code}")
+
+        async for chunk in response.aiter_content():
+            content += decoder.decode(chunk)
+            # Markers can straddle chunk borders, so rescan the end of what was read before
+            start = max(0, scanned - chunk_size)
+            pending = [marker for marker in pending if not marker.search(content, start)]
+            scanned = len(content)
+            if not pending:
+                core.logger.debug(f"All markers found after {scanned} characters, closing: {url}")
+                break
+
+        else:
+            content += decoder.decode(b"", final=True)
+
+    finally:
+        # aclose() waits for the whole transfer, so abort it first. curl stops at the next chunk it receives and the
+        # stream task finishes in the background, nothing after the markers is read.
+        if response.quit_now is not None:
+            response.quit_now.set()
+
+        if response.astream_task is None or response.astream_task.done():
+            await response.aclose()
+
+    return content
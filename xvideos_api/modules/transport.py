@@ -0,0 +1,168 @@
+"""
+Shared transport layer.
+
+A SharedTransport owns exactly one pooled AsyncSession. Every Client / Account that should reuse it gets its own
+ScopedCore from `SharedTransport.create_core()`. A ScopedCore keeps its own cookie jar and headers and only layers them
+onto each request. Cookies the server sets go into the jar of the scope that sent the request, so tenants never write
+into the pooled session.
+"""
+import time
+import asyncio
+
+from dataclasses import dataclass
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+from base_api.base import BaseCore
+from curl_cffi.requests import Cookies
+from base_api.modules.config import RuntimeConfig, config
+
+from .streaming import stream_page
+
+
+@dataclass
+class PoolStats:
+    max_connections: int
+    in_flight: int
+    peak_in_flight: int
+    waiting: int
+    total_requests: int
+    total_wait_time: float
+    scopes: int
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+class SharedTransport:
+    def __init__(self, configuration: RuntimeConfig = config, max_connections: int = 20):
+        """
+        :param configuration: (RuntimeConfig) The configuration used to build the pooled session
+        :param max_connections: (int) The maximum number of sockets open at the same time across all scopes
+        """
+        if max_connections < 1:
+            raise ValueError("max_connections must be >= 1")
+
+        self.configuration = configuration
+        self.max_connections = max_connections
+        self.core = BaseCore(configuration=configuration) # Owns the one and only session
+        self._slots = asyncio.Semaphore(max_connections)
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._waiting = 0
+        self._total_requests = 0
+        self._total_wait_time = 0.0
+        self._scopes = 0
+
+    @property
+    def session(self):
+        self.initialize_session()
+        return self.core.session
+
+    def initialize_session(self) -> None:
+        if self.core.session is not None:
+            return
+
+        self.core.initialize_session()
+        # curl_cffi sizes its handle pool in __init__, so it needs to be rebuilt to honour our limit
+        self.core.session.max_clients = self.max_connections
+        self.core.session.init_pool()
+
+    def create_core(self, cookies: Dict[str, str] | None = None, headers: Dict[str, str] | None = None) -> "ScopedCore":
+        """
+        :param cookies: (dict) Cookies only sent by this scope
+        :param headers: (dict) Headers only sent by this scope
+        :return: (ScopedCore) A core that can be passed to Client(core=...)
+        """
+        self._scopes += 1
+        return ScopedCore(transport=self, cookies=cookies, headers=headers)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._total_wait_time += time.perf_counter() - started
+        self._in_flight += 1
+        self._total_requests += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        try:
+            yield
+
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            max_connections=self.max_connections,
+            in_flight=self._in_flight,
+            peak_in_flight=self._peak_in_flight,
+            waiting=self._waiting,
+            total_requests=self._total_requests,
+            total_wait_time=self._total_wait_time,
+            scopes=self._scopes,
+        )
+
+    async def close(self) -> None:
+        if self.core.session is not None:
+            await self.core.session.close()
+            self.core.session = None
+
+
+class ScopedSession:
+    """
+    The pooled session as seen by one scope. Requests go out over the pooled session, but the cookies of the response
+    are stored in the jar of the scope instead of the session jar.
+    """
+    def __init__(self, session, cookies: Cookies):
+        self.session = session
+        self.cookies = cookies
+
+    async def request(self, *args, **kwargs):
+        kwargs["discard_cookies"] = True
+        response = await self.session.request(*args, **kwargs)
+        for redirect in response.history: # Set-Cookie on a redirect counts as well
+            self.cookies.update(getattr(redirect, "cookies", None) or {})
+
+        self.cookies.update(response.cookies)
+        return response
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
+
+
+class ScopedCore(BaseCore):
+    """
+    A BaseCore that borrows the session of a SharedTransport. Cookies and headers set on the scope are merged into
+    each request instead of being stored on the session, and cookies set by the server only end up in `self.cookies`.
+    """
+    def __init__(self, transport: SharedTransport, cookies: Dict[str, str] | None = None,
+                 headers: Dict[str, str] | None = None):
+        super().__init__(configuration=transport.configuration)
+        self.transport = transport
+        self.cookies = Cookies(cookies or {})
+        self.headers: Dict[str, str] = dict(headers or {})
+
+    def initialize_session(self) -> None:
+        # Never build a private session, always bind to the pooled one
+        self.session = ScopedSession(self.transport.session, self.cookies)
+
+    def _merged_headers(self, override: Dict[str, str] | None) -> Dict[str, Any]:
+        headers = super()._merged_headers(None)
+        headers.update(self.headers)
+        if override:
+            headers.update(override)
+
+        return headers
+
+    async def fetch(self, url: str, *args, **kwargs):
+        async with self.transport.slot():
+            return await super().fetch(url, *args, **kwargs)
+
+    async def stream(self, url: str, markers: list, chunk_size: int = 16384):
+        async with self.transport.slot():
+            return await stream_page(self, url, markers, chunk_size=chunk_size)
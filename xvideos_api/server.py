@@ -0,0 +1,389 @@
+"""
+Long-running metadata server.
+
+Keeps one warm Client (session, cache and parsed objects survive between requests) and exposes it over a tiny
+asyncio HTTP server. POST a JSON list (or NDJSON lines) of requests to /batch and the results are streamed back as
+NDJSON, one line per finished request:
+
+    {"type": "video", "url": "https://www.xvideos.com/video.xyz/..."}
+    {"type": "search", "query": "something", "pages": 1}
+    {"type": "channel", "url": "https://www.xvideos.com/channels/..."}
+    {"type": "pornstar", "url": "https://www.xvideos.com/pornstars/..."}
+
+GET /stats returns the cache / coalescing counters as JSON. `xvideos_api_server --benchmark` (or benchmark()) measures
+the server locally against a fake upstream.
+"""
+import json
+import time
+import asyncio
+import logging
+import argparse
+
+from types import SimpleNamespace
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List
+from base_api.base import setup_logger
+
+from xvideos_api.xvideos_api import Client
+from xvideos_api.modules.consts import safe_attribute
+
+
+def video_to_dict(video) -> dict:
+    author = safe_attribute(video, "author")
+    pornstars = safe_attribute(video, "pornstars") or []
+    return {
+        "url": video.url,
+        "title": safe_attribute(video, "title"),
+        "description": safe_attribute(video, "description"),
+        "thumbnail_url": safe_attribute(video, "thumbnail_url"),
+        "publish_date": safe_attribute(video, "publish_date"),
+        "length": safe_attribute(video, "length"),
+        "views": safe_attribute(video, "views"),
+        "likes": safe_attribute(video, "likes"),
+        "dislikes": safe_attribute(video, "dislikes"),
+        "tags": safe_attribute(video, "tags"),
+        "m3u8_base_url": safe_attribute(video, "m3u8_base_url"),
+        "author": author.url if author is not None else None,
+        "pornstars": [pornstar.url for pornstar in pornstars],
+    }
+
+
+def profile_to_dict(profile) -> dict:
+    return {
+        "url": profile.url,
+        "name": safe_attribute(profile, "name"),
+        "thumbnail_url": safe_attribute(profile, "thumbnail_url"),
+        "total_videos": safe_attribute(profile, "total_videos"),
+        "total_pages": safe_attribute(profile, "total_pages"),
+        "country": safe_attribute(profile, "country"),
+        "profile_hits": safe_attribute(profile, "profile_hits"),
+        "last_activity": safe_attribute(profile, "last_activity"),
+    }
+
+
+class MetadataServer:
+    def __init__(self, client: Client | None = None, host: str = "127.0.0.1", port: int = 8765,
+                 max_concurrency: int = 8, cache_size: int = 1024, cache_ttl: float = 600.0):
+        """
+        :param client: (Client) The client shared by all requests, any object with the same coroutines works
+        :param host: (str) Address to bind to
+        :param port: (int) Port to bind to, 0 picks a free one
+        :param max_concurrency: (int) Maximum number of upstream operations running at the same time
+        :param cache_size: (int) Maximum number of cached results
+        :param cache_ttl: (float) Seconds a cached result stays valid
+        """
+        self.client = client or Client()
+        self.host = host
+        self.port = port
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self.in_flight: Dict[tuple, asyncio.Task] = {}
+        self.counters = {"requests": 0, "cache_hits": 0, "coalesced": 0, "upstream": 0, "errors": 0}
+        self.server: asyncio.AbstractServer | None = None
+        self.logger = setup_logger(name="XVIDEOS API - [MetadataServer]", log_file=None, level=logging.ERROR)
+
+    def enable_logging(self, log_file: str | None = None, level: int | None = None, log_ip: str | None = None,
+                       log_port: int | None = None):
+        if not level:
+            level = logging.DEBUG
+        self.logger = setup_logger(name="XVIDEOS API - [MetadataServer]", log_file=log_file, level=level,
+                                   http_ip=log_ip, http_port=log_port)
+
+    def _cache_get(self, key: tuple) -> Any:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if time.monotonic() - stored_at > self.cache_ttl:
+            del self.cache[key]
+            return None
+
+        self.cache.move_to_end(key)
+        return value
+
+    def _cache_put(self, key: tuple, value: Any) -> None:
+        self.cache[key] = (time.monotonic(), value)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def _coalesced(self, key: tuple, producer: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs the producer once per key, concurrent callers for the same key share the result. The producer runs as
+        its own task, so a caller that goes away (client disconnect) doesn't take the result of the others with it.
+        """
+        cached = self._cache_get(key)
+        if cached is not None:
+            self.counters["cache_hits"] += 1
+            return cached
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+
+        else:
+            task = asyncio.ensure_future(self._produce(key, producer))
+            task.add_done_callback(lambda t: t.cancelled() or t.exception()) # Nobody may be left to retrieve it
+            self.in_flight[key] = task
+
+        return await asyncio.shield(task)
+
+    async def _produce(self, key: tuple, producer: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            async with self.semaphore:
+                self.counters["upstream"] += 1
+                result = await producer()
+
+            self._cache_put(key, result)
+            return result
+
+        finally:
+            del self.in_flight[key]
+
+    async def _search(self, query: str, pages: int) -> List[dict]:
+        return [video_to_dict(video) async for video in self.client.search(query, pages=pages)]
+
+    async def handle(self, request: dict) -> Any:
+        kind = request.get("type")
+        if kind == "video":
+            url = request["url"]
+            return await self._coalesced(("video", url), lambda: self._video(url))
+
+        elif kind == "search":
+            query, pages = request["query"], int(request.get("pages", 1))
+            return await self._coalesced(("search", query, pages), lambda: self._search(query, pages))
+
+        elif kind == "channel":
+            url = request["url"]
+            return await self._coalesced(("channel", url), lambda: self._profile(self.client.get_channel(url)))
+
+        elif kind == "pornstar":
+            url = request["url"]
+            return await self._coalesced(("pornstar", url), lambda: self._profile(self.client.get_pornstar(url)))
+
+        raise ValueError(f"Unknown request type: {kind}")
+
+    async def _video(self, url: str) -> dict:
+        return video_to_dict(await self.client.get_video(url))
+
+    @staticmethod
+    async def _profile(awaitable) -> dict:
+        return profile_to_dict(await awaitable)
+
+    async def run_batch(self, requests: List[dict]):
+        """Yields one result dict per request in completion order"""
+        async def run(index: int, request: Any) -> dict:
+            self.counters["requests"] += 1
+            if not isinstance(request, dict):
+                self.counters["errors"] += 1
+                return {"id": index, "ok": False, "error": f"ValueError: Request must be an object, got: {request!r}"}
+
+            request_id = request.get("id", index)
+            try:
+                return {"id": request_id, "ok": True, "result": await self.handle(request)}
+
+            except Exception as e:
+                self.counters["errors"] += 1
+                self.logger.warning(f"Request {request} failed: {e}")
+                return {"id": request_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+        tasks = [asyncio.ensure_future(run(index, request)) for index, request in enumerate(requests)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def parse_body(body: bytes) -> List[dict]:
+        text = body.decode("utf-8").strip()
+        if not text:
+            return []
+
+        if text.startswith("["):
+            return json.loads(text)
+
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    @staticmethod
+    def _bad_request(writer: asyncio.StreamWriter, message: str) -> None:
+        payload = message.encode()
+        writer.write(b"HTTP/1.1 400 Bad Request\r\nConnection: close\r\nContent-Length: "
+                     + str(len(payload)).encode() + b"\r\n\r\n" + payload)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin1").split()
+            if len(request_line) < 2:
+                return
+
+            method, path = request_line[0], request_line[1]
+            content_length = 0
+            while True:
+                line = (await reader.readline()).decode("latin1").strip()
+                if not line:
+                    break
+
+                name, _, value = line.partition(":")
+                if name.lower() == "content-length":
+                    value = value.strip()
+                    if not value.isdigit():
+                        self._bad_request(writer, f"Invalid Content-Length: {value!r}")
+                        return
+
+                    content_length = int(value)
+
+            body = await reader.readexactly(content_length) if content_length else b""
+
+            if method == "GET" and path == "/stats":
+                payload = json.dumps({**self.counters, "cached": len(self.cache)}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                             b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload)
+
+            elif method == "POST" and path == "/batch":
+                try:
+                    requests = self.parse_body(body)
+
+                except (ValueError, UnicodeDecodeError) as e:
+                    self._bad_request(writer, f"Invalid request body: {e}")
+                    return
+
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+                             b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+                async for result in self.run_batch(requests):
+                    line = (json.dumps(result) + "\n").encode()
+                    writer.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+                    await writer.drain()
+
+                writer.write(b"0\r\n\r\n")
+
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nConnection: close\r\nContent-Length: 0\r\n\r\n")
+
+            await writer.drain()
+
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            self.logger.debug(f"Connection dropped: {e}")
+
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.logger.info(f"Serving on {self.host}:{self.port}")
+
+    async def serve_forever(self) -> None:
+        if self.server is None:
+            await self.start()
+
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        for task in list(self.in_flight.values()):
+            task.cancel()
+
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+
+class FakeUpstream:
+    """Answers like a Client after a fixed delay, without touching the network. Used by benchmark()"""
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+
+    async def _answer(self, url: str) -> SimpleNamespace:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return SimpleNamespace(url=url, title=f"Title of {url}", tags=["fake"])
+
+    async def get_video(self, url: str) -> SimpleNamespace:
+        return await self._answer(url)
+
+    async def get_channel(self, url: str) -> SimpleNamespace:
+        return await self._answer(url)
+
+    async def get_pornstar(self, url: str) -> SimpleNamespace:
+        return await self._answer(url)
+
+    async def search(self, query: str, pages: int = 1):
+        for page in range(pages):
+            yield await self._answer(f"https://www.xvideos.com/video.{query}{page}/fake")
+
+
+async def benchmark(requests: int = 1000, unique: int = 100, connections: int = 10, latency: float = 0.05,
+                    max_concurrency: int = 8) -> dict:
+    """
+    Runs the server against a FakeUpstream and posts batches over real connections, so the HTTP handling,
+    coalescing, caching and the concurrency limit are measured without depending on the site.
+
+    :param requests: (int) Total number of video requests
+    :param unique: (int) Number of distinct URLs among them, the rest are served by coalescing / the cache
+    :param connections: (int) Number of concurrent connections the requests are spread over
+    :param latency: (float) Seconds the fake upstream takes per request
+    :param max_concurrency: (int) Maximum number of upstream operations running at the same time
+    :return: (dict) Elapsed time, throughput, upstream calls and the server counters
+    """
+    upstream = FakeUpstream(latency=latency)
+    server = MetadataServer(client=upstream, port=0, max_concurrency=max_concurrency)
+    await server.start()
+
+    async def post(batch: List[dict]) -> int:
+        body = json.dumps(batch).encode()
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"POST /batch HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+        return sum(1 for line in raw.split(b"\r\n") if line.startswith(b"{"))
+
+    items = [{"type": "video", "url": f"https://www.xvideos.com/video.bench{idx % unique}/fake"}
+             for idx in range(requests)]
+
+    start = time.perf_counter()
+    try:
+        answered = sum(await asyncio.gather(*(post(items[idx::connections]) for idx in range(connections))))
+
+    finally:
+        await server.close()
+
+    elapsed = time.perf_counter() - start
+    return {"requests": requests, "answered": answered, "elapsed": elapsed,
+            "requests_per_second": answered / elapsed if elapsed else None, "upstream_calls": upstream.calls,
+            **server.counters}
+
+
+async def run_server():
+    parser = argparse.ArgumentParser(description="XVideos API metadata server")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Address to bind to")
+    parser.add_argument("--port", type=int, default=8765, help="Port to bind to")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum concurrent upstream operations")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Maximum number of cached results")
+    parser.add_argument("--cache-ttl", type=float, default=600.0, help="Seconds a cached result stays valid")
+    parser.add_argument("--benchmark", action="store_true", help="Benchmark against a fake upstream and exit")
+
+    args = parser.parse_args()
+    if args.benchmark:
+        print(json.dumps(await benchmark(max_concurrency=args.concurrency), indent=2))
+        return
+
+    server = MetadataServer(host=args.host, port=args.port, max_concurrency=args.concurrency,
+                            cache_size=args.cache_size, cache_ttl=args.cache_ttl)
+    await server.serve_forever()
+
+
+def main():
+    asyncio.run(run_server())
+
+
+if __name__ == "__main__":
+    main()
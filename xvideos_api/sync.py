@@ -0,0 +1,249 @@
+"""
+Synchronous facade over the async API.
+
+Every sync object runs its coroutines on one persistent background event loop thread, so the session (connection
+pool, cookies, cache) stays warm between calls, unlike `asyncio.run(client.get_video(...))` which builds and tears
+down a loop and a session for every call. Calls are thread-safe, a thread pool can use one SyncClient concurrently.
+Listing generators become plain iterators that keep fetching up to `prefetch` videos ahead of the consumer.
+
+    client = SyncClient()
+    video = client.get_video("https://www.xvideos.com/video.xyz/...")
+    for video in client.search("query", pages=1):
+        print(video.title)
+
+    client.close() # Closes the session and stops the loop thread of the client
+"""
+import asyncio
+import threading
+
+from typing import Any, AsyncIterator, Callable, Coroutine, Iterator, List
+
+from xvideos_api.xvideos_api import Client, Video, Channel, Pornstar, Account
+
+
+_END = object()
+
+
+class LoopThread:
+    """One event loop running forever in a daemon thread"""
+    def __init__(self, name: str = "xvideos_api-loop"):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coroutine: Coroutine, timeout: float | None = None) -> Any:
+        """Runs a coroutine on the loop and blocks the calling thread until it finished"""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("Blocking call from inside the loop thread would deadlock, await the coroutine instead")
+
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(timeout)
+
+    def call(self, function: Callable[[], Any]) -> Any:
+        """Runs a plain function on the loop thread (e.g. to create objects that bind to the loop)"""
+        async def wrapper():
+            return function()
+
+        return self.run(wrapper())
+
+    def iterate(self, generator: AsyncIterator, prefetch: int = 8) -> Iterator[Any]:
+        """
+        Turns an async generator into a blocking iterator. A producer task on the loop keeps up to `prefetch` items
+        buffered, so the next item is usually ready when the consumer asks for it.
+        """
+        buffer: asyncio.Queue = self.call(lambda: asyncio.Queue(maxsize=max(1, prefetch)))
+
+        async def produce():
+            try:
+                async for item in generator:
+                    await buffer.put((item, None))
+
+            except asyncio.CancelledError:
+                raise # The consumer went away, nobody is waiting for the error
+
+            except Exception as e:
+                await buffer.put((_END, e))
+                return
+
+            finally:
+                await generator.aclose()
+
+            await buffer.put((_END, None))
+
+        future = asyncio.run_coroutine_threadsafe(produce(), self.loop)
+        try:
+            while True:
+                item, error = self.run(buffer.get())
+                if error is not None:
+                    raise error
+
+                if item is _END:
+                    return
+
+                yield item
+
+        finally:
+            future.cancel()
+
+    def stop(self) -> None:
+        if self.loop.is_closed():
+            return
+
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+
+class _SyncWrapper:
+    """Forwards plain attributes (properties, metadata) to the wrapped async object"""
+    def __init__(self, obj: Any, loop: LoopThread, prefetch: int):
+        self._obj = obj
+        self._loop = loop
+        self._prefetch = prefetch
+
+    def __getattr__(self, name: str) -> Any:
+        return _wrap(getattr(self._obj, name), self._loop, self._prefetch)
+
+    def _run(self, coroutine: Coroutine) -> Any:
+        return _wrap(self._loop.run(coroutine), self._loop, self._prefetch)
+
+    def _iterate(self, generator: AsyncIterator, prefetch: int | None) -> Iterator[Any]:
+        for item in self._loop.iterate(generator, prefetch=prefetch or self._prefetch):
+            yield _wrap(item, self._loop, self._prefetch)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {getattr(self._obj, 'url', '')}>"
+
+
+class SyncVideo(_SyncWrapper):
+    def get_segments(self, quality) -> list:
+        return self._run(self._obj.get_segments(quality))
+
+    def download(self, quality, path="./", *args, **kwargs):
+        """See Video.download. The callback is called from the loop thread."""
+        return self._run(self._obj.download(quality, path, *args, **kwargs))
+
+    def download_adaptive(self, path="./", *args, **kwargs):
+        """See Video.download_adaptive. The callback is called from the loop thread."""
+        return self._run(self._obj.download_adaptive(path, *args, **kwargs))
+
+
+class SyncChannel(_SyncWrapper):
+    def videos(self, pages: int = 0, videos_concurrency: int | None = None, pages_concurrency: int | None = None,
+               fields: list[str] | None = None, prefetch: int | None = None) -> Iterator[SyncVideo]:
+        return self._iterate(self._obj.videos(pages=pages, videos_concurrency=videos_concurrency,
+                                              pages_concurrency=pages_concurrency, fields=fields), prefetch)
+
+
+class SyncPornstar(SyncChannel):
+    pass
+
+
+class SyncAccount(_SyncWrapper):
+    def get_recommended_videos(self, pages: int = 2, videos_concurrency: int | None = None,
+                               pages_concurrency: int | None = None, fields: list[str] | None = None,
+                               prefetch: int | None = None) -> Iterator[SyncVideo]:
+        return self._iterate(self._obj.get_recommended_videos(pages, videos_concurrency, pages_concurrency, fields),
+                             prefetch)
+
+    def get_liked_videos(self, pages: int = 2, videos_concurrency: int | None = None,
+                         pages_concurrency: int | None = None, fields: list[str] | None = None,
+                         prefetch: int | None = None) -> Iterator[SyncVideo]:
+        return self._iterate(self._obj.get_liked_videos(pages, videos_concurrency, pages_concurrency, fields),
+                             prefetch)
+
+    def get_watch_later_videos(self, pages: int = 2, videos_concurrency: int | None = None,
+                               pages_concurrency: int | None = None, fields: list[str] | None = None,
+                               prefetch: int | None = None) -> Iterator[SyncVideo]:
+        return self._iterate(self._obj.get_watch_later_videos(pages, videos_concurrency, pages_concurrency, fields),
+                             prefetch)
+
+
+WRAPPERS = {
+    Video: SyncVideo,
+    Channel: SyncChannel,
+    Pornstar: SyncPornstar,
+    Account: SyncAccount,
+}
+
+
+def _wrap(value: Any, loop: LoopThread, prefetch: int) -> Any:
+    wrapper = WRAPPERS.get(type(value))
+    if wrapper is not None:
+        return wrapper(value, loop, prefetch)
+
+    if isinstance(value, list) and value and type(value[0]) in WRAPPERS:
+        return [_wrap(item, loop, prefetch) for item in value] # e.g. Video.pornstars, Channel.worked_for_with
+
+    return value
+
+
+class SyncClient(_SyncWrapper):
+    def __init__(self, *args, loop: LoopThread | None = None, prefetch: int = 8, **kwargs):
+        """
+        Takes the same arguments as Client.
+
+        :param loop: (LoopThread) The loop thread to run on, by default the client starts its own and stops it in
+                     close(). A loop that is passed in is left running, so it can be shared between clients.
+        :param prefetch: (int) Videos fetched ahead of the consumer in listing iterators
+        """
+        self._owns_loop = loop is None
+        loop = loop or LoopThread()
+        # The session has to be created on the loop it will be used from
+        super().__init__(loop.call(lambda: Client(*args, **kwargs)), loop, prefetch)
+
+    @property
+    def client(self) -> Client:
+        """The wrapped async client"""
+        return self._obj
+
+    def get_video(self, url: str, stream: bool = False, fields: list[str] | None = None) -> SyncVideo:
+        return self._run(self._obj.get_video(url, stream=stream, fields=fields))
+
+    def get_videos(self, urls: List[str], stream: bool = False, fields: list[str] | None = None,
+                   return_exceptions: bool = False) -> List[SyncVideo | BaseException]:
+        """Fetches many videos concurrently on the loop, with a single blocking call"""
+        async def gather():
+            return await asyncio.gather(*(self._obj.get_video(url, stream=stream, fields=fields) for url in urls),
+                                        return_exceptions=return_exceptions)
+
+        return [_wrap(video, self._loop, self._prefetch) for video in self._loop.run(gather())]
+
+    def search(self, query: str, *args, prefetch: int | None = None, **kwargs) -> Iterator[SyncVideo]:
+        """See Client.search"""
+        return self._iterate(self._obj.search(query, *args, **kwargs), prefetch)
+
+    def get_playlist(self, url: str, *args, prefetch: int | None = None, **kwargs) -> Iterator[SyncVideo]:
+        """See Client.get_playlist"""
+        return self._iterate(self._obj.get_playlist(url, *args, **kwargs), prefetch)
+
+    def get_pornstar(self, url: str) -> SyncPornstar:
+        return self._run(self._obj.get_pornstar(url))
+
+    def get_channel(self, url: str) -> SyncChannel:
+        return self._run(self._obj.get_channel(url))
+
+    def get_account(self, cookies: dict | None = None) -> SyncAccount:
+        return self._loop.call(lambda: _wrap(self._obj.get_account(cookies), self._loop, self._prefetch))
+
+    def close(self) -> None:
+        if self._loop.loop.is_closed():
+            return
+
+        session = self._obj.core.session
+        if session is not None:
+            self._loop.run(session.close())
+            self._obj.core.session = None
+
+        if self._owns_loop:
+            self._loop.stop()
+
+    def __enter__(self) -> "SyncClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
@@ -0,0 +1,65 @@
+import os
+import pytest
+from ..modules.adaptive import AdaptiveDownloader
+from ..modules.replay import HttpArchive, ReplayCore
+
+BASE = "https://cdn.example.invalid/hls"
+
+
+def recorded_stream(segments: int = 12) -> HttpArchive:
+    """Two variants with 1 s segments: 720p at 20 kB/s of media, 360p at 2 kB/s"""
+    archive = HttpArchive(":memory:")
+    master = ("#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=160000,RESOLUTION=1280x720\nhls-720p.m3u8\n"
+              "#EXT-X-STREAM-INF:BANDWIDTH=16000,RESOLUTION=640x360\nhls-360p.m3u8\n")
+    archive.put("GET", f"{BASE}/hls.m3u8", 200, {"content-type": "application/vnd.apple.mpegurl"}, master.encode())
+    for height, size in ((720, 20_000), (360, 2_000)):
+        playlist = "#EXTM3U\n#EXT-X-TARGETDURATION:1\n"
+        for idx in range(segments):
+            playlist += f"#EXTINF:1.0,\nhls-{height}p-{idx}.ts\n"
+            archive.put("GET", f"{BASE}/hls-{height}p-{idx}.ts", 200, {}, bytes([height % 256]) * size)
+
+        archive.put("GET", f"{BASE}/hls-{height}p.m3u8", 200, {}, (playlist + "#EXT-X-ENDLIST\n").encode())
+
+    return archive
+
+
+@pytest.mark.asyncio
+async def test_downgrades_on_slow_link(tmp_path):
+    core = ReplayCore(recorded_stream(), bandwidth=100_000) # 720p would need 2.4 s for 12 segments
+    downloader = AdaptiveDownloader(core, target_time=1.0, min_samples=2, max_workers=2)
+    report = await downloader.download(f"{BASE}/hls.m3u8", str(tmp_path / "out.ts"))
+
+    assert report.status == "completed"
+    assert [d.reason for d in report.decisions] == ["initial", "downgrade"]
+    assert report.decisions[-1].to_height == 360 and report.quality == 360
+    assert report.total == 12 and report.downloaded == 12
+    assert os.path.getsize(tmp_path / "out.ts") == report.bytes
+
+
+@pytest.mark.asyncio
+async def test_initial_pick_from_bandwidths(tmp_path):
+    core = ReplayCore(recorded_stream(segments=3))
+    downloader = AdaptiveDownloader(core, target_time=1.0, initial_throughput=10_000)
+    report = await downloader.download(f"{BASE}/hls.m3u8", str(tmp_path / "out.ts"))
+    assert report.decisions[0].reason == "initial_estimate" and report.decisions[0].to_height == 360
+
+
+class FlakyCore(ReplayCore):
+    """One 720p segment never arrives"""
+    async def fetch(self, url, *args, **kwargs):
+        if url.endswith("hls-720p-1.ts"):
+            raise ConnectionError("Segment gone")
+
+        return await super().fetch(url, *args, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_failed_segment_falls_back_to_lower_variant(tmp_path):
+    downloader = AdaptiveDownloader(FlakyCore(recorded_stream(segments=3)), max_workers=2)
+    report = await downloader.download(f"{BASE}/hls.m3u8", str(tmp_path / "out.ts"))
+
+    assert report.status == "completed" and report.downloaded == 3
+    decisions = [(d.reason, d.segment, d.to_height) for d in report.decisions]
+    assert decisions == [("initial", 0, 720), ("fallback", 1, 360)]
+    high, low = bytes([720 % 256]) * 20_000, bytes([360 % 256]) * 2_000
+    assert (tmp_path / "out.ts").read_bytes() == high + low + high
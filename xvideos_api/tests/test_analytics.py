@@ -0,0 +1,67 @@
+import json
+import random
+import pytest
+from ..modules.analytics import ListingAnalytics, QuantileSketch, TopK, merge_snapshots
+from ..modules.sorting import SortQuality, SortVideoTime
+
+
+class FakeProfile:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeVideo:
+    def __init__(self, idx):
+        self.url = f"https://www.xvideos.com/video.v{idx}/slug"
+        self.tags = ["common", f"tag{idx % 5}"]
+        self.views = str(idx * 10)
+        self.length = f"{idx % 30} min"
+        self.likes = "90"
+        self.dislikes = "10"
+        self.author = FakeProfile(f"https://www.xvideos.com/channels/channel{idx % 3}")
+
+
+async def listing(start, stop):
+    for idx in range(start, stop):
+        yield FakeVideo(idx)
+
+
+def test_quantile_sketch_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(8, 2) for _ in range(20_000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    values.sort()
+    for q in (0.1, 0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact
+    assert len(sketch.buckets) < 2048
+
+
+def test_top_k_bounded():
+    top = TopK(capacity=10)
+    for idx in range(1000):
+        top.add("hot" if idx % 2 else f"rare{idx}")
+
+    assert len(top.counts) == 10
+    assert top.top(1)[0][0] == "hot"
+
+
+@pytest.mark.asyncio
+async def test_listing_analytics_merge():
+    worker_a = ListingAnalytics(height=lambda video: 1080)
+    seen = [video async for video in worker_a.track(listing(1, 51))]
+    assert len(seen) == 50
+
+    worker_b = await ListingAnalytics().consume(listing(51, 101))
+    merged = merge_snapshots([json.loads(json.dumps(worker_a.snapshot())), worker_b.snapshot()])
+
+    assert merged.videos == 100
+    assert merged.top_tags(1)[0][:2] == ("common", 100)
+    assert {name for name, _, _ in merged.top_uploaders(3)} == {"channel0", "channel1", "channel2"}
+    assert merged.quality_counts[SortQuality.Sort_1080_plus] == 50 and merged.quality_counts["unknown"] == 50
+    assert merged.duration_counts[SortVideoTime.Sort_all] == 100
+    assert abs(merged.views.quantile(0.5) - 500) <= 0.02 * 500
+    assert merged.rating.quantile(0.5) == pytest.approx(0.9, rel=0.02)
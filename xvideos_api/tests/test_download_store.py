@@ -0,0 +1,97 @@
+import os
+import asyncio
+import pytest
+from base_api.modules.type_hints import DownloadReport
+from ..modules.download_store import DownloadStore
+
+
+class FakeCore:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = []
+
+    async def download(self, video, quality, path, callback, segment_state_path, segment_dir, return_report,
+                       **kwargs):
+        self.calls.append((path, segment_state_path, segment_dir))
+        await asyncio.sleep(0.01)
+        if not self.fail:
+            with open(path, "wb") as file:
+                file.write(b"video")
+
+        return DownloadReport(status="failed" if self.fail else "completed", total=3, downloaded=2 if self.fail else 3,
+                              missing=[2] if self.fail else [], missing_urls=[], segment_dir=segment_dir,
+                              segment_state_path=segment_state_path, start_segment=0, quality=quality)
+
+
+class FakeVideo:
+    def __init__(self, url, core):
+        self.url = url
+        self.core = core
+        self.m3u8_base_url = "https://cdn.example/hls.m3u8"
+
+
+@pytest.mark.asyncio
+async def test_download_store_deduplicates(tmp_path):
+    store = DownloadStore(str(tmp_path / "store"))
+    core = FakeCore()
+    first = FakeVideo("https://www.xvideos.com/video.abc123/first_slug", core)
+    second = FakeVideo("https://xvideos.com/video.abc123/other_slug", core)
+
+    results = await asyncio.gather(store.download(first, "best", path=str(tmp_path / "a.mp4")),
+                                   store.download(second, "best", path=str(tmp_path / "b.mp4")))
+    assert results == [True, True]
+    assert len(core.calls) == 1
+    assert os.path.samefile(tmp_path / "a.mp4", tmp_path / "b.mp4")
+    assert store.has("https://www.xvideos.com/video.abc123/", "BEST")
+    assert store.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_download_store_resumes_partial(tmp_path):
+    store = DownloadStore(str(tmp_path / "store"))
+    video = FakeVideo("https://www.xvideos.com/video.def456/slug", FakeCore(fail=True))
+    report = await store.download(video, 720, return_report=True)
+    assert report.status == "failed"
+    assert store.lookup(video.url, 720).status == "partial"
+
+    video.core = FakeCore()
+    assert await store.download(video, 720)
+    assert video.core.calls[0][1].endswith(".state.json") # Same state path as the failed run
+    assert store.lookup(video.url, 720).complete
+
+
+class BrokenCore(FakeCore):
+    async def download(self, *args, **kwargs):
+        raise KeyError("Broken playlist")
+
+    async def legacy_download(self, path, callback, url):
+        self.calls.append((path, url))
+        with open(path, "wb") as file:
+            file.write(b"legacy video")
+
+
+@pytest.mark.asyncio
+async def test_download_store_falls_back_to_legacy_download_without_hls(tmp_path):
+    store = DownloadStore(str(tmp_path / "store"))
+    video = FakeVideo("https://www.xvideos.com/video.ghi789/slug", BrokenCore())
+    del video.m3u8_base_url # Like a page the HLS regex finds nothing on
+    video.cdn_url = "https://cdn.example/ghi789.mp4"
+
+    assert await store.download(video, "best", path=str(tmp_path / "c.mp4"))
+    assert video.core.calls[0][1] == video.cdn_url
+    assert (tmp_path / "c.mp4").read_bytes() == b"legacy video"
+    assert store.has(video.url, "best")
+    assert not store._locks and not store._lock_users # Locks don't outlive their downloads
+
+
+@pytest.mark.asyncio
+async def test_download_store_raises_hls_failures(tmp_path):
+    store = DownloadStore(str(tmp_path / "store"))
+    video = FakeVideo("https://www.xvideos.com/video.jkl012/slug", BrokenCore())
+    video.cdn_url = "https://cdn.example/jkl012.mp4"
+
+    with pytest.raises(KeyError):
+        await store.download(video, "best")
+
+    assert not video.core.calls # No legacy download, no made up "completed" entry
+    assert store.lookup(video.url, "best").status == "partial"
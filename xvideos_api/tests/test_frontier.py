@@ -0,0 +1,76 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from ..modules.frontier import CrawlFrontier, FrontierBackend, SQLiteFrontierBackend, crawl
+
+
+def listing(ids) -> str:
+    return "".join(f'<div class="frame-block"><p class="title"><a href="/video.{i}/slug_{i}">x</a></p></div>'
+                   for i in ids)
+
+
+class FakeCore:
+    async def fetch(self, url):
+        page = int(url.rsplit("=", 1)[1])
+        if page < 0:
+            return SimpleNamespace(status_code=404) # What BaseCore.fetch returns for a 404
+
+        return listing(range(page * 5, page * 5 + 10)) # Neighbouring pages overlap
+
+
+class FakeClient:
+    def __init__(self):
+        self.core = FakeCore()
+
+    async def get_video(self, url, fields=None):
+        await asyncio.sleep(0.001)
+        return url
+
+
+@pytest.mark.asyncio
+async def test_workers_share_frontier(tmp_path):
+    path = str(tmp_path / "frontier.db")
+    frontier = CrawlFrontier(SQLiteFrontierBackend(path))
+    assert frontier.add_pages(f"https://www.xvideos.com/?k=test&p={page}" for page in range(4)) == 4
+    assert frontier.add_pages(["https://www.xvideos.com/?k=test&p=0"]) == 0
+
+    async def worker(name):
+        # Every worker gets its own connection, just like separate processes would
+        own = CrawlFrontier(SQLiteFrontierBackend(path))
+        return [video async for video in crawl(FakeClient(), own, worker_id=name, batch_size=2, poll_interval=0.01)]
+
+    results = await asyncio.gather(worker("a"), worker("b"), worker("c"))
+    seen = [url for result in results for url in result]
+    assert len(seen) == len(set(seen)) == 25
+    assert frontier.stats() == {"pending": 0, "leased": 0, "done": 29, "failed": 0}
+
+
+@pytest.mark.asyncio
+async def test_missing_pages_are_marked_failed(tmp_path):
+    frontier = CrawlFrontier(SQLiteFrontierBackend(str(tmp_path / "frontier.db")), max_attempts=1)
+    frontier.add_pages(["https://www.xvideos.com/?k=test&p=-1", "https://www.xvideos.com/?k=test&p=0"])
+
+    videos = [video async for video in crawl(FakeClient(), frontier, worker_id="a", poll_interval=0.01)]
+    assert len(videos) == 10
+    assert frontier.stats() == {"pending": 0, "leased": 0, "done": 11, "failed": 1}
+
+
+def test_expired_lease_is_handed_out_again(tmp_path):
+    backend = SQLiteFrontierBackend(str(tmp_path / "frontier.db"))
+    frontier = CrawlFrontier(backend)
+    frontier.add_videos(["https://www.xvideos.com/video.abc/one", "https://xvideos.com/video.abc/other_slug"])
+    assert frontier.stats()["pending"] == 1
+
+    assert len(backend.lease("crashed", "video", 10, lease_time=-1)) == 1
+    item = backend.lease("alive", "video", 10, lease_time=60)[0]
+    backend.complete(item.key, "alive")
+    assert frontier.stats()["done"] == 1
+
+
+def test_backends_have_to_implement_the_interface():
+    class Incomplete(FrontierBackend):
+        def add(self, items):
+            return 0
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+from types import SimpleNamespace
+from ..modules.graph import GraphCrawler, GraphEdge, GraphNode
+
+
+def listing(ids) -> str:
+    return "".join(f'<div class="frame-block"><p class="title"><a href="/video.{i}/slug_{i}">x</a></p></div>'
+                   for i in ids)
+
+
+class FakeCore:
+    def __init__(self, client):
+        self.client = client
+
+    async def fetch(self, url):
+        if "/missing/" in url:
+            return await self.client.request(SimpleNamespace(status_code=404)) # What BaseCore.fetch returns
+
+        return await self.client.request(listing(f"{url.split('/')[-4]}v{i}" for i in range(10)))
+
+
+class FakeClient:
+    """Every video is uploaded by one channel and features four pornstars, every profile worked with two channels"""
+    def __init__(self):
+        self.core = FakeCore(self)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def request(self, result):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        return result
+
+    async def get_video(self, url):
+        name = url.split("/")[-2].split(".")[-1]
+        return await self.request(SimpleNamespace(
+            url=url, author=SimpleNamespace(url=f"https://www.xvideos.com/channels/up_{name}"),
+            pornstars=[SimpleNamespace(url=f"https://www.xvideos.com/pornstars/star_{name}_{i}") for i in range(4)],
+            tags=["Tag"]))
+
+    async def get_profile(self, url):
+        name = url.rstrip("/").split("/")[-1]
+        worked_with = [SimpleNamespace(url=f"https://www.xvideos.com/channels/{name}_partner_{i}") for i in range(2)]
+        return await self.request(SimpleNamespace(url=url, worked_for_with=worked_with))
+
+    get_channel = get_profile
+    get_pornstar = get_profile
+
+
+async def collect(crawler: GraphCrawler, seeds: list) -> tuple[list, list]:
+    items = [item async for item in crawler.crawl(seeds)]
+    nodes = [item for item in items if isinstance(item, GraphNode)]
+    return nodes, [item for item in items if isinstance(item, GraphEdge)]
+
+
+@pytest.mark.asyncio
+async def test_videos_per_profile_is_a_count():
+    crawler = GraphCrawler(FakeClient(), max_depth=1, videos_per_profile=3)
+    nodes, edges = await collect(crawler, ["https://www.xvideos.com/channels/seed"])
+
+    assert len([edge for edge in edges if edge.source == "channel:/seed" and edge.relation == "has_video"]) == 3
+    assert len([node for node in nodes if node.kind == "video" and node.depth == 1]) == 3
+
+
+@pytest.mark.asyncio
+async def test_edges_only_point_to_reported_nodes():
+    client = FakeClient()
+    crawler = GraphCrawler(client, max_depth=2, max_nodes_per_depth={0: 1, 1: 2, 2: 3}, concurrency=2,
+                           videos_per_profile=2)
+    nodes, edges = await collect(crawler, ["https://www.xvideos.com/video.seed/slug"])
+
+    ids = [node.id for node in nodes]
+    assert len(ids) == len(set(ids)) # Nobody is reported twice
+    assert all(edge.source in ids and edge.target in ids for edge in edges)
+    for depth, limit in {0: 1, 1: 2, 2: 3}.items():
+        assert len([node for node in nodes if node.depth == depth and node.kind != "tag"]) <= limit
+
+    assert client.peak_in_flight <= 2
+
+
+@pytest.mark.asyncio
+async def test_profile_without_video_listing_is_still_reported():
+    crawler = GraphCrawler(FakeClient(), max_depth=1, videos_per_profile=3)
+    nodes, edges = await collect(crawler, ["https://www.xvideos.com/channels/missing"])
+
+    seed = next(node for node in nodes if node.id == "channel:/missing")
+    assert seed.error is None and seed.data is not None
+    assert not [edge for edge in edges if edge.source == seed.id and edge.relation == "has_video"]
@@ -0,0 +1,96 @@
+from concurrent.futures import ThreadPoolExecutor
+from ..modules.local_index import LocalIndex, parse_count, parse_date, parse_duration
+from ..modules.sorting import Sort, SortVideoTime
+
+
+class FakeProfile:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeVideo:
+    def __init__(self, video_id, title, tags, views, length):
+        self.url = f"https://www.xvideos.com/video.{video_id}/slug"
+        self.title = title
+        self.description = f"Description of {title}"
+        self.tags = tags
+        self.views = views
+        self.length = length
+        self.likes = "90"
+        self.dislikes = "10"
+        self.publish_date = "2024-01-01T00:00:00+00:00"
+        self.author = FakeProfile("https://www.xvideos.com/channels/some_channel")
+        self.pornstars = [FakeProfile("https://www.xvideos.com/pornstars/some-pornstar")]
+
+    @property
+    def thumbnail_url(self):
+        raise KeyError("thumbnailUrl") # Missing fields must not break indexing
+
+
+def test_parsers():
+    assert parse_count("1.2M") == 1_200_000
+    assert parse_count("12,345") == 12345
+    assert parse_count("12.5") == 12
+    assert parse_count("1.234.567") == 1_234_567
+    assert parse_date("2024-01-01T02:00:00+02:00") == "2024-01-01T00:00:00+00:00"
+    assert parse_date("2024-01-01") == "2024-01-01T00:00:00+00:00"
+    assert parse_date("yesterday") is None
+    assert parse_duration("1 h 5 min") == 3900
+    assert parse_duration("45 sec") == 45
+
+
+def test_search_local():
+    index = LocalIndex(":memory:")
+    index.add_video(FakeVideo("a1", "Beach sunset", ["outdoor"], "1.2M", "5 min"))
+    index.add_video(FakeVideo("b2", "Beach volleyball", ["sport"], "300", "25 min"))
+    index.add_video(FakeVideo("b2", "Beach volleyball", ["sport", "outdoor"], "350", "25 min")) # Update
+    assert len(index) == 2
+
+    assert {r["id"] for r in index.search_local("beach")} == {"a1", "b2"}
+    assert [r["id"] for r in index.search_local("outdoor", sorting_sort=Sort.Sort_views)] == ["a1", "b2"]
+    assert [r["id"] for r in index.search_local("beach", sorting_time=SortVideoTime.Sort_really_long)] == ["b2"]
+    assert index.search_local("some_channel")[0]["uploader"] == "some_channel"
+    assert index.search_local("nothing") == []
+
+
+class PartialVideo:
+    """A video whose page was only partially read, everything but the title is missing"""
+    def __init__(self, video_id, title):
+        self.url = f"https://www.xvideos.com/video.{video_id}/slug"
+        self.title = title
+
+    def __getattr__(self, name):
+        raise KeyError(name)
+
+
+def test_partial_videos_dont_overwrite_indexed_fields():
+    index = LocalIndex(":memory:")
+    index.add_video(FakeVideo("a1", "Beach sunset", ["tag1"], "1.2M", "5 min"))
+    index.add_video(PartialVideo("a1", "Beach sunset at noon"))
+
+    row = index.search_local("tag1")[0]
+    assert row["title"] == "Beach sunset at noon"
+    assert row["tags"] == ["tag1"] and row["views"] == 1_200_000 and row["uploader"] == "some_channel"
+
+
+def test_index_can_be_used_from_other_threads():
+    index = LocalIndex(":memory:")
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda i: index.add_video(FakeVideo(f"v{i}", "Beach", ["outdoor"], "10", "5 min")),
+                          range(20)))
+
+    assert len(index) == 20
+
+
+def test_publish_dates_are_sorted_as_dates():
+    index = LocalIndex(":memory:")
+    for video_id, date in [("a1", "2024-01-01T23:00:00-05:00"), ("b2", "2024-01-02T01:00:00+00:00"),
+                           ("c3", "2024-01-01T12:00:00Z")]:
+        video = FakeVideo(video_id, "Beach", ["outdoor"], "100", "5 min")
+        video.publish_date = date
+        index.add_video(video)
+
+    # As raw text b2 would come first, in UTC a1 (04:00 on the 2nd) is the newest
+    assert [r["id"] for r in index.search_local("beach", sorting_sort=Sort.Sort_upload_date)] == ["a1", "b2", "c3"]
+    assert index.search_local("beach", sorting_sort=Sort.Sort_upload_date)[0]["publish_date"] == \
+           "2024-01-02T04:00:00+00:00"
@@ -0,0 +1,36 @@
+import os
+import asyncio
+import pytest
+from types import SimpleNamespace
+from ..modules.media import MediaFetcher
+
+
+class FakeCore:
+    """Serves the same image under every URL, so all of them map to one object"""
+    def __init__(self):
+        self.calls = []
+
+    async def fetch(self, url, method="GET", get_response=False, save_cache=True):
+        self.calls.append((method, url))
+        await asyncio.sleep(0.001)
+        return SimpleNamespace(status_code=200, content=b"image" * 100, headers={"etag": "v1"})
+
+
+@pytest.mark.asyncio
+async def test_media_fetcher_deduplicates_and_counts_all_bytes(tmp_path):
+    core = FakeCore()
+    fetcher = MediaFetcher(core, root=str(tmp_path / "media"), concurrency=4, previews=False)
+    items = [{"thumbnail_url": f"https://img.example/thumb_{i}.jpg"} for i in range(8)]
+
+    report = await fetcher.fetch_all(items)
+    assert report.fetched + report.deduplicated == 8 and report.failed == 0
+    assert report.bytes == 8 * 500
+    assert report.stored_bytes == report.fetched * 500
+
+    objects = [name for _, _, names in os.walk(tmp_path / "media" / "objects") for name in names]
+    assert len(objects) == 1 # No temporary files left behind
+
+    again = await fetcher.fetch_all(items + [{"thumbnail_url": "https://img.example/thumb_0.jpg"}])
+    assert again.skipped == 8 and again.bytes == 0
+    assert [method for method, _ in core.calls].count("HEAD") == 8
+    fetcher.close()
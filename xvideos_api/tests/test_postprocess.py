@@ -0,0 +1,127 @@
+import hashlib
+import multiprocessing
+import pytest
+from base_api.modules.type_hints import DownloadReport
+from ..modules import postprocess
+from ..modules.postprocess import PostProcessJob, PostProcessor, playlist_duration, run_job
+
+
+def report(status: str = "completed") -> DownloadReport:
+    return DownloadReport(status=status, total=2, downloaded=2, missing=[], missing_urls=[], segment_dir=None,
+                          segment_state_path=None, start_segment=1, quality="best")
+
+
+class FakeCore:
+    async def get_m3u8_by_quality(self, m3u8_url, quality):
+        return "https://hls.example/720p.m3u8"
+
+    async def fetch(self, url, save_cache=True):
+        return "#EXTM3U\n#EXT-X-TARGETDURATION:10\n#EXTINF:10.0,\na.ts\n#EXTINF:10.0,\nb.ts\n#EXTINF:4.5,\nc.ts\n"
+
+
+@pytest.mark.asyncio
+async def test_postprocess_checksums_and_progress(tmp_path):
+    progress = []
+    files = []
+    for index in range(5):
+        path = tmp_path / f"{index}.mp4"
+        path.write_bytes(bytes([index]) * 1000)
+        files.append(path)
+
+    async with PostProcessor(max_workers=2, queue_size=1, remux=False, checksum="sha256",
+                             callback_progress=lambda done, submitted: progress.append((done, submitted))) as post:
+        for path in files:
+            await post.submit(report(), str(path))
+
+        await post.submit(report("failed"), str(tmp_path / "broken.mp4"))
+
+    results = {result.path: result for result in post.results}
+    for path in files:
+        assert results[str(path)].status == "completed"
+        assert results[str(path)].checksum == hashlib.sha256(path.read_bytes()).hexdigest()
+
+    assert results[str(tmp_path / "broken.mp4")].status == "skipped"
+    assert [done for done, _ in progress] == list(range(1, 7))
+    assert post.stats() == {"submitted": 6, "finished": 6, "pending": 0, "completed": 5, "skipped": 1}
+
+
+@pytest.mark.asyncio
+async def test_postprocess_missing_file_fails(tmp_path):
+    async with PostProcessor(max_workers=1, remux=False, checksum="md5") as post:
+        await post.submit(report(), str(tmp_path / "missing.mp4"))
+
+    assert post.results[0].status == "failed"
+    assert "FileNotFoundError" in post.results[0].error
+
+
+@pytest.mark.asyncio
+async def test_playlist_duration_from_start_segment():
+    assert await playlist_duration(FakeCore(), "https://hls.example/master.m3u8", "best") == 24.5
+    assert await playlist_duration(FakeCore(), "https://hls.example/master.m3u8", "best", start_segment=1) == 14.5
+
+
+def job(tmp_path, remux: bool, expected_duration: float | None = None) -> PostProcessJob:
+    source = tmp_path / "video.ts"
+    source.write_bytes(b"ts")
+    return PostProcessJob(path=str(source), output=str(tmp_path / "video.mp4"), remux=remux, checksum=None,
+                          expected_duration=expected_duration, tolerance=2.0, ios_support=False)
+
+
+class FakeRemuxCore:
+    """Stands in for BaseCore, whose remux needs PyAV"""
+    built = 0
+
+    def __init__(self):
+        FakeRemuxCore.built += 1
+        self.calls = []
+
+    def _convert_ts_to_mp4(self, input_path, output_path, callback=None, ios_support=False):
+        self.calls.append(input_path)
+        for done in (1, 2, 2, 4):
+            if callback:
+                callback(done, 4)
+
+        with open(output_path, "wb") as file:
+            file.write(b"mp4")
+
+
+def test_run_job_reuses_the_core_of_the_process(tmp_path, monkeypatch):
+    monkeypatch.setattr(postprocess, "BaseCore", FakeRemuxCore)
+    monkeypatch.setattr(postprocess, "_core", None)
+    FakeRemuxCore.built = 0
+    results = [run_job(job(tmp_path, remux=True)) for _ in range(3)]
+
+    assert [result.status for result in results] == ["completed"] * 3 and FakeRemuxCore.built == 1
+    assert postprocess.worker_core().calls == [str(tmp_path / "video.ts")] * 3
+    assert (tmp_path / "video.mp4").read_bytes() == b"mp4" and not (tmp_path / "video.ts").exists()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork", reason="Workers must inherit the fake core")
+async def test_postprocess_forwards_remux_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(postprocess, "BaseCore", FakeRemuxCore)
+    monkeypatch.setattr(postprocess, "_core", None)
+    updates = []
+    paths = []
+    for index in range(3):
+        path = tmp_path / f"{index}.ts"
+        path.write_bytes(b"ts")
+        paths.append(str(tmp_path / f"{index}.mp4"))
+
+    async with PostProcessor(max_workers=2, verify_duration=False,
+                             callback_remux=lambda path, done, total: updates.append((path, done, total))) as post:
+        for index, output in enumerate(paths):
+            await post.submit(report(), str(tmp_path / f"{index}.ts"), output=output)
+
+    assert [result.status for result in post.results] == ["completed"] * 3
+    for output in paths: # Per file, repeated percentages are dropped in the worker
+        assert [(done, total) for path, done, total in updates if path == output] == [(1, 4), (2, 4), (4, 4)]
+
+
+def test_run_job_checks_the_duration(tmp_path, monkeypatch):
+    monkeypatch.setattr(postprocess, "probe_duration", lambda path: 20.0)
+    assert run_job(job(tmp_path, remux=False, expected_duration=21.0)).duration_ok
+
+    failed = run_job(job(tmp_path, remux=False, expected_duration=30.0))
+    assert failed.status == "failed" and failed.duration_ok is False
+    assert "playlist says 30.0s" in failed.error
@@ -0,0 +1,104 @@
+import re
+import asyncio
+import pytest
+from base_api.modules.config import RuntimeConfig
+from ..modules.proxy_pool import ProxyPool
+
+
+async def stand_in_proxy(name: str, hits: dict, status: str = "200 OK"):
+    """A local forward proxy that answers every request itself"""
+    async def handle(reader, writer):
+        await reader.readuntil(b"\r\n\r\n")
+        hits[name] = hits.get(name, 0) + 1
+        body = f"<html>via {name}</html>".encode()
+        writer.write(f"HTTP/1.1 {status}\r\n".encode() + b"Content-Type: text/html\r\nConnection: close\r\nContent-Length: "
+                     + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+@pytest.mark.asyncio
+async def test_proxy_pool_shards_and_ejects():
+    hits = {}
+    servers = [await stand_in_proxy(name, hits) for name in ("a", "b")]
+    configuration = RuntimeConfig()
+    configuration.max_retries = 1
+    dead_proxy = "http://127.0.0.1:1"
+    pool = ProxyPool([dead_proxy] + [url for _, url in servers], configuration=configuration, max_per_proxy=2)
+
+    core = pool.create_core()
+    results = await asyncio.gather(*(core.fetch(f"http://example.invalid/{idx}", save_cache=False)
+                                     for idx in range(8)))
+    assert all(result.startswith("<html>via") for result in results)
+    assert hits["a"] > 0 and hits["b"] > 0
+
+    dead = next(stats for stats in pool.stats() if stats["proxy"] == dead_proxy)
+    assert not dead["healthy"] and dead["ejections"] >= 1
+
+    sticky = pool.create_core(sticky_key="tenant-1")
+    first = await sticky.fetch("http://example.invalid/sticky", save_cache=False)
+    for _ in range(3):
+        assert await sticky.fetch("http://example.invalid/sticky", save_cache=False) == first
+
+    await pool.close()
+    for server, _ in servers:
+        server.close()
+
+
+@pytest.mark.asyncio
+async def test_streamed_pages_are_routed_through_the_pool():
+    hits = {}
+    server, url = await stand_in_proxy("a", hits)
+    configuration = RuntimeConfig()
+    configuration.max_retries = 1
+    pool = ProxyPool([url], configuration=configuration)
+
+    content = await pool.create_core().stream("http://example.invalid/video", [re.compile("via")])
+    assert content.startswith("<html>via a")
+    assert hits["a"] == 1 and pool.stats()[0]["successes"] == 1
+
+    await pool.close()
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_blocked_proxies_are_ejected_and_skipped():
+    hits = {}
+    blocked, blocked_url = await stand_in_proxy("blocked", hits, status="403 Forbidden")
+    limited, limited_url = await stand_in_proxy("limited", hits, status="429 Too Many Requests")
+    clean, clean_url = await stand_in_proxy("clean", hits)
+    configuration = RuntimeConfig()
+    configuration.max_retries = 1
+    pool = ProxyPool([blocked_url, limited_url, clean_url], configuration=configuration)
+    for endpoint in pool.endpoints:
+        endpoint.latency = 0.0 if endpoint.proxy != clean_url else 1.0 # Make sure the blocked ones are tried first
+
+    assert await pool.create_core().fetch("http://example.invalid/page", save_cache=False) == "<html>via clean</html>"
+    stats = {entry["proxy"]: entry for entry in pool.stats()}
+    for url in (blocked_url, limited_url):
+        assert not stats[url]["healthy"]
+        assert stats[url]["bot_detections"] == 1 and stats[url]["ejections"] == 1
+
+    assert stats[clean_url]["healthy"] and stats[clean_url]["successes"] == 1
+
+    await pool.close()
+    for server in (blocked, limited, clean):
+        server.close()
+
+
+def test_pool_is_usable_from_more_than_one_loop():
+    pool = ProxyPool(["http://127.0.0.1:1"], max_per_proxy=1, core_factory=lambda proxy: object())
+
+    async def contend():
+        first = await pool.acquire()
+        waiter = asyncio.ensure_future(pool.acquire()) # Has to wait on the condition for the slot
+        await asyncio.sleep(0)
+        await pool.release(first, latency=0.1)
+        await pool.release(await asyncio.wait_for(waiter, timeout=1), latency=0.1)
+
+    asyncio.run(contend())
+    asyncio.run(contend()) # e.g. a SyncClient loop thread after a plain asyncio.run()
+    assert pool.endpoints[0].successes == 4 and pool.endpoints[0].in_flight == 0
@@ -0,0 +1,64 @@
+import time
+import asyncio
+import pytest
+from ..modules.rate_limit import HostRateLimiter, classify_url
+from ..modules.replay import HttpArchive, ReplayCore
+from ..xvideos_api import Client
+
+
+def test_classify_url():
+    assert classify_url("https://www.xvideos.com/video.abc123/slug") == "watch"
+    assert classify_url("https://www.xvideos.com/channels/some_channel") == "profile"
+    assert classify_url("https://www.xvideos.com/?k=query&p=1") == "listing"
+    assert classify_url("https://hls-cdn.xvideos-cdn.com/abc/hls-720p-1.ts") == "cdn"
+
+
+@pytest.mark.asyncio
+async def test_buckets_are_shared(tmp_path):
+    # Two limiters on one file behave like two worker processes
+    path = str(tmp_path / "rate.db")
+    first = HostRateLimiter(path, rates={"watch": (20.0, 2.0)})
+    second = HostRateLimiter(path, rates={"watch": (20.0, 2.0)})
+    started = time.perf_counter()
+    await asyncio.gather(*(limiter.acquire("watch") for limiter in [first, second] * 5))
+    assert time.perf_counter() - started >= 0.35 # 8 requests beyond the burst at 20 per second
+    throttled = first.stats()["watch"]["throttled"] + second.stats()["watch"]["throttled"]
+    assert throttled == 8
+
+
+@pytest.mark.asyncio
+async def test_install_limits_fetch(tmp_path):
+    archive = HttpArchive(":memory:")
+    for idx in range(3):
+        archive.put("GET", f"https://cdn.example.invalid/seg-{idx}.ts", 200, {}, b"x")
+
+    core = ReplayCore(archive)
+    limiter = HostRateLimiter(str(tmp_path / "rate.db"), rates={"cdn": (20.0, 1.0)})
+    limiter.install(core)
+    limiter.install(core) # Installing twice must not wrap twice
+    for idx in range(3):
+        assert await core.fetch(f"https://cdn.example.invalid/seg-{idx}.ts", get_bytes=True) == b"x"
+
+    assert limiter.stats()["cdn"]["requests"] == 3
+    assert limiter.stats()["cdn"]["throttled"] == 2
+
+
+@pytest.mark.asyncio
+async def test_install_reads_positional_arguments(tmp_path):
+    archive = HttpArchive(":memory:")
+    archive.put("GET", "https://cdn.example.invalid/seg.ts", 200, {}, b"x")
+    core = ReplayCore(archive)
+    limiter = HostRateLimiter(str(tmp_path / "rate.db"), rates={"cdn": (20.0, 1.0)})
+    limiter.install(core)
+
+    core.cache.handle_cache = lambda url: "cached" # A text fetch would be served from the cache
+    assert await core.fetch("https://cdn.example.invalid/seg.ts", True) == b"x" # get_bytes passed positionally
+    assert limiter.stats()["cdn"]["requests"] == 1
+
+
+def test_clients_get_their_own_core(tmp_path):
+    limiter = HostRateLimiter(str(tmp_path / "rate.db"))
+    limited = Client(rate_limiter=limiter)
+    assert limited.core.rate_limiter is limiter
+    assert Client().core is not limited.core
+    assert getattr(Client().core, "rate_limiter", None) is None
@@ -0,0 +1,57 @@
+import time
+import asyncio
+import pytest
+from base_api.modules.config import RuntimeConfig
+from ..modules.errors import ReplayMiss
+from ..modules.replay import HttpArchive, RecordingCore, ReplayCore
+
+
+async def stand_in_server():
+    async def handle(reader, writer):
+        request = await reader.readuntil(b"\r\n\r\n")
+        path = request.split(b" ")[1]
+        body = b"#EXTM3U\n" if path.endswith(b".m3u8") else b"<html>" + path + b"</html>"
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: close\r\nContent-Length: "
+                     + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+@pytest.mark.asyncio
+async def test_record_and_replay(tmp_path):
+    server, base = await stand_in_server()
+    configuration = RuntimeConfig()
+    configuration.max_retries = 1
+    archive = HttpArchive(str(tmp_path / "archive.db"))
+
+    recorder = RecordingCore(archive, configuration=configuration)
+    page = await recorder.fetch(f"{base}/page", save_cache=False)
+    playlist = await recorder.fetch(f"{base}/hls.m3u8", get_bytes=True)
+    server.close()
+    assert page == "<html>/page</html>" and playlist == b"#EXTM3U\n"
+    assert len(archive) == 2
+
+    replay = ReplayCore(HttpArchive(str(tmp_path / "archive.db")), configuration=configuration)
+    assert await replay.fetch(f"{base}/page", save_cache=False) == page
+    assert await replay.fetch(f"{base}/hls.m3u8", get_bytes=True) == playlist
+    response = await replay.fetch(f"{base}/page", method="HEAD", get_response=True)
+    assert response.status_code == 200 and response.headers.get("content-type") == "text/html"
+
+    with pytest.raises(ReplayMiss):
+        await replay.fetch(f"{base}/never-recorded")
+
+
+@pytest.mark.asyncio
+async def test_replay_shaping():
+    archive = HttpArchive(":memory:")
+    for idx in range(4):
+        archive.put("GET", f"https://example.invalid/{idx}", 200, {"content-type": "video/mp2t"}, b"x" * 10_000)
+
+    replay = ReplayCore(archive, latency=0.02, bandwidth=200_000) # 4 * 10 kB over one 200 kB/s link ~ 0.2 s
+    started = time.perf_counter()
+    await asyncio.gather(*(replay.fetch(f"https://example.invalid/{idx}", get_bytes=True) for idx in range(4)))
+    assert 0.2 <= time.perf_counter() - started < 1.0
+    assert replay.hits == 4
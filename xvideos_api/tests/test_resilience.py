@@ -0,0 +1,109 @@
+import time
+import asyncio
+import pytest
+from curl_cffi.requests import Response
+from curl_cffi.requests.exceptions import HTTPError
+from base_api.modules.config import RuntimeConfig
+from base_api.modules.errors import NetworkingError
+from ..xvideos_api import get_html_content
+from ..modules.resilience import ResiliencePolicy, RetryPolicy, RetryBudget, CircuitBreaker
+from ..modules.errors import BotDetection, NetworkError
+
+
+class FaultyCore:
+    """Injects faults instead of talking to the network: every 10th URL stalls on its first attempt"""
+    def __init__(self, fail_first: int = 0):
+        self.calls = {}
+        self.fail_first = fail_first
+
+    async def fetch(self, url, *args, **kwargs):
+        attempt = self.calls[url] = self.calls.get(url, 0) + 1
+        if attempt <= self.fail_first:
+            raise NetworkingError("injected")
+
+        if attempt == 1 and url.endswith("0"):
+            await asyncio.sleep(0.5)
+
+        await asyncio.sleep(0.01)
+        return "<html></html>"
+
+
+async def p99(core) -> float:
+    async def timed(idx):
+        started = time.perf_counter()
+        await get_html_content(core, f"https://www.xvideos.com/video.{idx}")
+        return time.perf_counter() - started
+
+    durations = sorted(await asyncio.gather(*(timed(idx) for idx in range(100))))
+    return durations[98]
+
+
+@pytest.mark.asyncio
+async def test_hedging_cuts_tail_latency():
+    plain = await p99(FaultyCore())
+    hedged_core = ResiliencePolicy(hedge_after=0.05).install(FaultyCore())
+    hedged = await p99(hedged_core)
+    assert plain >= 0.5
+    assert hedged < 0.2
+    assert hedged_core.resilience.stats["hedge_wins"] == 10
+
+
+@pytest.mark.asyncio
+async def test_retries_and_breaker():
+    core = ResiliencePolicy(retry=RetryPolicy(base_delay=0.001)).install(FaultyCore(fail_first=2))
+    assert await get_html_content(core, "https://www.xvideos.com/video.1/x") == "<html></html>"
+    assert core.resilience.stats["retries"] == 2
+
+    breaker = CircuitBreaker(threshold=2, cooldown=0.1)
+    breaker.record()
+    breaker.record()
+    assert breaker.is_open
+    policy = ResiliencePolicy(breaker=breaker, retry=RetryPolicy(attempts={BotDetection: 1}))
+    started = time.perf_counter()
+    await policy.run(lambda: asyncio.sleep(0), url="https://www.xvideos.com/")
+    assert time.perf_counter() - started >= 0.09
+
+
+class BlockedCore:
+    """Answers like BaseCore.fetch does when blocked: a 403 as HTTPError, then challenge pages"""
+    def __init__(self):
+        self.configuration = RuntimeConfig()
+        self.configuration.max_retries = 3
+        self.calls = 0
+
+    async def fetch(self, url, *args, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            response = Response()
+            response.status_code = 403
+            raise HTTPError("HTTP Error 403", 0, response)
+
+        return "<html><title>Just a moment...</title><script src='/cdn-cgi/challenge-platform/x.js'></script>"
+
+
+@pytest.mark.asyncio
+async def test_bot_blocks_trip_the_breaker_at_core_level():
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    policy = ResiliencePolicy(retry=RetryPolicy(attempts={BotDetection: 2}, base_delay=0.001), breaker=breaker)
+    core = policy.install(BlockedCore())
+
+    with pytest.raises(BotDetection):
+        await core.fetch("https://www.xvideos.com/new/1") # Listing pages go through core.fetch as well
+
+    assert core.calls == 2 and policy.stats["bot_blocks"] == 2
+    assert breaker.is_open and breaker.trips == 1
+
+
+@pytest.mark.asyncio
+async def test_retries_are_charged_with_the_core_retries():
+    budget = RetryBudget(min_retries=4)
+    policy = ResiliencePolicy(retry=RetryPolicy(attempts={NetworkError: 5}, base_delay=0.001), budget=budget)
+    core = FaultyCore(fail_first=5)
+    core.configuration = RuntimeConfig()
+    core.configuration.max_retries = 2
+    policy.install(core)
+
+    with pytest.raises(NetworkingError):
+        await core.fetch("https://www.xvideos.com/video.1/x")
+
+    assert policy.stats["retries"] == 2 and policy.stats["budget_exhausted"] == 1 # 2 + 2 of 4, then out
@@ -0,0 +1,103 @@
+import json
+import asyncio
+import pytest
+from ..server import MetadataServer, benchmark
+
+
+class FakeVideo:
+    def __init__(self, url):
+        self.url = url
+        self.title = f"Title of {url}"
+        self.tags = ["a", "b"]
+
+
+class FakeClient:
+    """Stands in for the upstream so the server can be exercised (and benchmarked) offline"""
+    def __init__(self):
+        self.calls = 0
+
+    async def get_video(self, url):
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return FakeVideo(url)
+
+    async def search(self, query, pages=1):
+        for idx in range(3):
+            yield FakeVideo(f"https://www.xvideos.com/video.{query}{idx}/x")
+
+
+@pytest.mark.asyncio
+async def test_batch_is_streamed_and_coalesced():
+    client = FakeClient()
+    server = MetadataServer(client=client, port=0)
+    await server.start()
+
+    body = "\n".join(json.dumps(r) for r in [
+        {"type": "video", "url": "https://www.xvideos.com/video.abc/x"},
+        {"type": "video", "url": "https://www.xvideos.com/video.abc/x"},
+        {"type": "search", "query": "test"},
+        {"type": "nope"},
+    ]).encode()
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(b"POST /batch HTTP/1.1\r\nContent-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    await server.close()
+
+    lines = [json.loads(line) for line in raw.split(b"\r\n") if line.startswith(b"{")]
+    assert len(lines) == 4
+    assert sum(1 for line in lines if line["ok"]) == 3
+    assert client.calls == 1
+    assert server.counters["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_coalesced_waiters_survive_owner_cancel():
+    client = FakeClient()
+    server = MetadataServer(client=client, port=0)
+    owner = asyncio.ensure_future(server.handle({"type": "video", "url": "https://www.xvideos.com/video.abc/x"}))
+    await asyncio.sleep(0)
+    waiter = asyncio.ensure_future(server.handle({"type": "video", "url": "https://www.xvideos.com/video.abc/x"}))
+    await asyncio.sleep(0)
+    owner.cancel() # The client of the first request disconnected
+
+    result = await asyncio.wait_for(waiter, timeout=1)
+    assert result["title"] == "Title of https://www.xvideos.com/video.abc/x"
+    assert client.calls == 1 and not server.in_flight
+
+
+@pytest.mark.asyncio
+async def test_batch_rejects_non_object_items():
+    server = MetadataServer(client=FakeClient(), port=0)
+    results = [result async for result in server.run_batch([1, "video", {"type": "nope", "id": "x"}])]
+
+    assert [result["ok"] for result in results] == [False, False, False]
+    assert sorted(str(result["id"]) for result in results) == ["0", "1", "x"]
+
+
+@pytest.mark.asyncio
+async def test_invalid_content_length_is_a_bad_request():
+    server = MetadataServer(client=FakeClient(), port=0)
+    await server.start()
+
+    responses = []
+    for value in (b"abc", b"-5", b"1.5"):
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"POST /batch HTTP/1.1\r\nContent-Length: " + value + b"\r\n\r\n[]")
+        await writer.drain()
+        responses.append(await reader.read())
+        writer.close()
+
+    await server.close()
+    assert all(response.startswith(b"HTTP/1.1 400 Bad Request") for response in responses)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_against_fake_upstream():
+    report = await benchmark(requests=200, unique=20, connections=5, latency=0.01, max_concurrency=4)
+
+    assert report["answered"] == 200
+    assert report["upstream_calls"] == report["upstream"] == 20
+    assert report["cache_hits"] + report["coalesced"] == 180
@@ -0,0 +1,85 @@
+import re
+import time
+import asyncio
+import pytest
+from base_api.base import BaseCore
+from base_api.modules.config import RuntimeConfig
+from ..modules.transport import SharedTransport
+from ..modules.errors import NotFound
+from ..xvideos_api import stream_html_content
+
+MARKER = re.compile(r"html5player\.setVideoHLS")
+HEAD = b"<html><head>" + b"x" * 40000 + b"<script>html5player.setVideoHLS('a.m3u8')</script>"
+TAIL = b"<div>tags</div></html>"
+
+
+async def stand_in_origin(requests: list):
+    """Sends the head of the page right away and the tail only after two seconds"""
+    async def handle(reader, writer):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        path = head.split(" ", 2)[1]
+        requests.append(path)
+        if path == "/missing":
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+            writer.close()
+            return
+
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: close\r\nContent-Length: "
+                     + str(len(HEAD) + len(TAIL)).encode() + b"\r\n\r\n" + HEAD)
+        await writer.drain()
+        try:
+            await asyncio.sleep(2)
+            writer.write(TAIL)
+            await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+def configuration() -> RuntimeConfig:
+    configuration = RuntimeConfig()
+    configuration.max_retries = 1
+    return configuration
+
+
+@pytest.mark.asyncio
+async def test_stream_stops_at_markers():
+    requests = []
+    server, origin = await stand_in_origin(requests)
+    core = BaseCore(configuration=configuration())
+
+    started = time.perf_counter()
+    content = await stream_html_content(core, f"{origin}/video", [MARKER], chunk_size=4096)
+    assert time.perf_counter() - started < 1.5 # Didn't wait for the tail
+    assert MARKER.search(content) and "tags" not in content
+
+    with pytest.raises(NotFound):
+        await stream_html_content(core, f"{origin}/missing", [MARKER])
+
+    await core.session.close()
+    server.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_uses_cache_and_core_routing():
+    requests = []
+    server, origin = await stand_in_origin(requests)
+    transport = SharedTransport(configuration=configuration(), max_connections=1)
+    core = transport.create_core()
+
+    core.cache.save_cache(f"{origin}/cached", "<html>complete page</html>")
+    assert await stream_html_content(core, f"{origin}/cached", [MARKER]) == "<html>complete page</html>"
+    assert requests == []
+
+    await stream_html_content(core, f"{origin}/video", [MARKER], chunk_size=4096)
+    assert requests == ["/video"]
+    assert transport.stats().total_requests == 1 # Went through the socket limit of the transport
+
+    await transport.close()
+    server.close()
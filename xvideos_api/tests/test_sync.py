@@ -0,0 +1,92 @@
+import asyncio
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from ..sync import LoopThread, SyncClient, SyncVideo
+
+
+async def numbers(count: int, fail_at: int | None = None):
+    for number in range(count):
+        if number == fail_at:
+            raise ValueError("broken page")
+
+        await asyncio.sleep(0)
+        yield number
+
+
+def test_loop_thread_run_and_iterate():
+    loop = LoopThread()
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda n: loop.run(asyncio.sleep(0.01, result=n)), range(32)))
+
+        assert results == list(range(32))
+        assert list(loop.iterate(numbers(20), prefetch=4)) == list(range(20))
+
+        for number in loop.iterate(numbers(1000), prefetch=2):
+            if number == 3:
+                break # The producer must be cancelled, not run to the end
+
+        with pytest.raises(ValueError):
+            list(loop.iterate(numbers(10, fail_at=5)))
+
+    finally:
+        loop.stop()
+
+
+def test_loop_thread_reuses_one_loop_and_runs_callers_concurrently():
+    # asyncio.run() would build (and tear down) one loop, and with it one session, per call
+    loops, running, peak = set(), [0], [0]
+
+    async def call():
+        loops.add(asyncio.get_running_loop())
+        running[0] += 1
+        peak[0] = max(peak[0], running[0])
+        await asyncio.sleep(0.05)
+        running[0] -= 1
+
+    loop = LoopThread(name="xvideos_api-test")
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(lambda _: loop.run(call()), range(16)))
+
+    finally:
+        loop.stop()
+
+    assert loops == {loop.loop}
+    assert peak[0] > 1 # Blocking callers don't serialize each other on the loop
+
+
+def test_sync_client_close_stops_its_own_loop_only():
+    client = SyncClient()
+    client.close()
+    assert not client._loop.thread.is_alive()
+    client.close() # Closing twice is fine
+
+    shared = LoopThread()
+    try:
+        first, second = SyncClient(loop=shared), SyncClient(loop=shared)
+        first.close()
+        assert shared.thread.is_alive()
+        second.close()
+        assert shared.thread.is_alive()
+
+    finally:
+        shared.stop()
+
+
+class FakeVideo:
+    url = "https://www.xvideos.com/video.abc/slug"
+
+    async def download_adaptive(self, path="./", target_time=None, **kwargs):
+        await asyncio.sleep(0)
+        return {"path": path, "target_time": target_time}
+
+
+def test_sync_video_download_adaptive():
+    loop = LoopThread()
+    try:
+        video = SyncVideo(FakeVideo(), loop, prefetch=1)
+        assert video.download_adaptive("./out", target_time=60) == {"path": "./out", "target_time": 60}
+
+    finally:
+        loop.stop()
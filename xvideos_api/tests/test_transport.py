@@ -0,0 +1,44 @@
+import asyncio
+import pytest
+from base_api.modules.config import RuntimeConfig
+from ..modules.transport import SharedTransport
+
+
+async def stand_in_origin():
+    """Sets `tenant=<value>` on /login?<value> and echoes the Cookie header on every other path"""
+    async def handle(reader, writer):
+        head = (await reader.readuntil(b"\r\n\r\n")).decode()
+        path = head.split(" ", 2)[1]
+        cookie = next((line.split(":", 1)[1].strip() for line in head.split("\r\n")
+                       if line.lower().startswith("cookie:")), "")
+        extra = f"Set-Cookie: tenant={path.split('?', 1)[1]}; Path=/\r\n" if path.startswith("/login") else ""
+        body = f"<html>{cookie}</html>".encode()
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: close\r\n{extra}"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+@pytest.mark.asyncio
+async def test_server_cookies_stay_in_their_scope():
+    server, origin = await stand_in_origin()
+    configuration = RuntimeConfig()
+    configuration.max_retries = 1
+    transport = SharedTransport(configuration=configuration, max_connections=2)
+    first = transport.create_core(cookies={"static": "one"})
+    second = transport.create_core()
+
+    await first.fetch(f"{origin}/login?alice", save_cache=False)
+    await second.fetch(f"{origin}/login?bob", save_cache=False)
+
+    assert "tenant=alice" in await first.fetch(f"{origin}/echo", save_cache=False)
+    seen_by_second = await second.fetch(f"{origin}/echo", save_cache=False)
+    assert "tenant=bob" in seen_by_second
+    assert "alice" not in seen_by_second and "static" not in seen_by_second
+    assert "tenant" not in transport.session.cookies
+
+    await transport.close()
+    server.close()
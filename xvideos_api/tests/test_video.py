@@ -25,3 +25,11 @@ async def test_get_video():
     assert isinstance(video.preview_video_url, str) and len(video.preview_video_url) > 0
     assert isinstance(video.publish_date, str) and len(video.publish_date) > 0
     assert isinstance(video.content_url, str) and len(video.content_url) > 0
+
+
+@pytest.mark.asyncio
+async def test_get_video_fields():
+    video_fields = await client.get_video(url, fields=["m3u8_base_url", "title"])
+    assert video_fields._soup is None
+    assert isinstance(video_fields.m3u8_base_url, str) and video_fields.m3u8_base_url.startswith("http")
+    assert isinstance(video_fields.title, str) and len(video_fields.title) > 0
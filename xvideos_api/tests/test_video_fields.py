@@ -0,0 +1,52 @@
+import pytest
+from base_api.base import BaseCore
+from ..xvideos_api import Client
+from ..modules.errors import IncompletePage
+
+HEAD = ('<html><script type="application/ld+json">{"name": "A title", "description": "d", "uploadDate": "2024"}'
+        '</script><script>html5player.setVideoHLS(\'https://hls.example/master.m3u8\');</script>')
+PAGE = HEAD + '<a class="is-keyword btn btn-default">tag1</a></html>'
+LISTING = "".join(f'<div class="frame-block"><p class="title"><a href="/video.v{idx}/x">v</a></p></div>'
+                  for idx in range(3))
+
+
+class FakeCore(BaseCore):
+    """Serves the listing / watch page and records whether a page was fetched completely or streamed"""
+    def __init__(self):
+        super().__init__()
+        self.fetched = []
+        self.streamed = []
+
+    async def fetch(self, url, *args, **kwargs):
+        self.fetched.append(url)
+        return LISTING if "/video." not in url else PAGE
+
+    async def stream(self, url, markers, chunk_size=16384):
+        self.streamed.append(url)
+        return HEAD
+
+
+@pytest.mark.asyncio
+async def test_listing_with_fields_skips_the_full_fetch():
+    core = FakeCore()
+    client = Client(core=core)
+    videos = [video async for video in client.search("x", pages=1, fields=["title", "m3u8_base_url"])]
+
+    assert [video.title for video in videos] == ["A title"] * 3
+    assert len(core.streamed) == 3
+    assert all("/video." not in url for url in core.fetched) # Only the listing page was fetched completely
+    assert all(video._soup is None for video in videos)
+
+
+@pytest.mark.asyncio
+async def test_fields_outside_the_stream_raise_until_fetched():
+    core = FakeCore()
+    video = await Client(core=core).get_video("https://www.xvideos.com/video.abc/x", fields=["m3u8_base_url"])
+    assert video.m3u8_base_url == "https://hls.example/master.m3u8"
+
+    with pytest.raises(IncompletePage):
+        video.tags
+
+    await video.init(fields=["tags"]) # Needs the complete page, so it is fetched now
+    assert video.tags == ["tag1"]
+    assert len(core.streamed) == 1 and len(core.fetched) == 1
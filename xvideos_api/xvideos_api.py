@@ -24,10 +24,10 @@ import threading
 import traceback
 
 
-from functools import cached_property
-from typing import Generator, AsyncGenerator
+from functools import cached_property, wraps
+from typing import AsyncGenerator
 from base_api.modules.type_hints import DownloadReport
-from curl_cffi.requests import Response, AsyncSession
+from curl_cffi.requests import Response, AsyncSession, RequestsError
 from base_api.base import BaseCore, setup_logger, Helper
 from base_api.modules.static_functions import str_to_bool
 from urllib.parse import urlparse, urlunparse, parse_qs, urlencode
@@ -45,18 +45,63 @@ try:
     from modules.errors import *
     from modules.sorting import *
     from modules.type_hints import *
+    from modules.transport import ScopedCore
+    from modules.streaming import stream_page
+    from modules.resilience import ResiliencePolicy
+    from modules.proxy_pool import PooledCore
+    from modules.local_index import LocalIndex
+    from modules.download_store import DownloadStore
+    from modules.adaptive import AdaptiveDownloader, AdaptiveDownloadReport
+    from modules.rate_limit import HostRateLimiter
 
 except (ModuleNotFoundError, ImportError):
     from .modules.consts import *
     from .modules.errors import *
     from .modules.sorting import *
     from .modules.type_hints import *
+    from .modules.transport import ScopedCore
+    from .modules.streaming import stream_page
+    from .modules.resilience import ResiliencePolicy
+    from .modules.proxy_pool import PooledCore
+    from .modules.local_index import LocalIndex
+    from .modules.download_store import DownloadStore
+    from .modules.adaptive import AdaptiveDownloader, AdaptiveDownloadReport
+    from .modules.rate_limit import HostRateLimiter
 
 
 async def get_html_content(core: BaseCore, url: str) -> str | None | dict:
+    return await _fetch_html_content(url=url, request=lambda: core.fetch(url))
+
+
+async def stream_html_content(core: BaseCore, url: str, markers: list, chunk_size: int = 16384) -> str:
+    """
+    Streams a page and stops reading as soon as every marker (compiled regex) matched. Returns the decoded prefix
+    that was read. The result is never cached, because it is usually not the complete page, but a cached complete
+    page is returned as is.
+    """
+    if not getattr(core, "supports_streaming", True):
+        return await get_html_content(core=core, url=url) # Record / replay cores only deal in complete pages
+
+    cached = core.cache.handle_cache(url)
+    if cached is not None:
+        return cached
+
+    rate_limiter = getattr(core, "rate_limiter", None) # Streaming bypasses core.fetch, so take the token here
+    if rate_limiter is not None:
+        await rate_limiter.acquire_url(url)
+
+    # Scoped / pooled cores and the resilience policy route streamed requests like their fetches
+    stream = getattr(core, "stream", None)
+    if stream is None:
+        stream = lambda *args, **kwargs: stream_page(core, *args, **kwargs)
+
+    return await _fetch_html_content(url=url, request=lambda: stream(url, markers, chunk_size=chunk_size))
+
+
+async def _fetch_html_content(url: str, request) -> str | None | dict:
     # What should I do here?
     try:
-        content = await core.fetch(url)
+        content = await request()
         if isinstance(content, str):
             return content
 
@@ -76,6 +121,32 @@ async def get_html_content(core: BaseCore, url: str) -> str | None | dict:
     except UnknownError as e:
         raise UnknownNetworkError(str(e)) from e
 
+    except RequestsError as e:
+        raise NetworkError(str(e)) from e
+
+
+async def iterate_videos(helper: Helper, fields: list[str] | None, **kwargs) -> AsyncGenerator['Video', None]:
+    """
+    Helper.iterator for the listing generators. Without fields every video page is fetched and initialized as usual.
+    With fields the videos are built through Video.init(fields=...), so the watch pages are only streamed and parsed
+    as far as these fields need.
+    """
+    if fields is None:
+        async for video in helper.iterator(**kwargs):
+            yield video
+
+        return
+
+    Video.plan_markers(fields) # Unknown fields fail before the first page is fetched
+
+    async def build(url: str, core: BaseCore) -> Video:
+        return await Video(url, core=core).init(fields=fields)
+
+    # A Helper per call, the constructor depends on the fields of this call
+    listing = Helper(core=helper.core, video_constructor=Video, logger=helper.logger, alternative_constructor=build)
+    async for video in listing.iterator(use_alternative_constructor=True, **kwargs):
+        yield video
+
 
 class Account(Helper):
     def __init__(self, core: BaseCore, cookies: dict | None = cookies):
@@ -93,54 +164,79 @@ session_token_auth = <token>
             }            
             """)
 
-        assert isinstance(self.core.session, AsyncSession)
-        self.core.session.cookies.update(cookies)
-        self.core.session.headers.update(headers)
+        if isinstance(self.core, (ScopedCore, PooledCore)):
+            # The session is shared with other clients, so the login must stay on this core only
+            self.core.cookies.update(cookies)
+            self.core.headers.update(headers)
+
+        else:
+            assert isinstance(self.core.session, AsyncSession)
+            self.core.session.cookies.update(cookies)
+            self.core.session.headers.update(headers)
+
         self.logger = setup_logger(name="XVIDEOS API - [Account]", log_file=None, level=logging.ERROR)
 
 
     async def get_recommended_videos(self, pages: int = 2, videos_concurrency: int | None = None,
-                                     pages_concurrency: int | None = None) -> AsyncGenerator['Video', None]:
+                                     pages_concurrency: int | None = None,
+                                     fields: list[str] | None = None) -> AsyncGenerator['Video', None]:
 
         page_urls = [f"https://www.xvideos.com/history/{page}" for page in range(pages)]
         videos_concurrency = videos_concurrency or self.core.configuration.videos_concurrency
         pages_concurrency = pages_concurrency or self.core.configuration.pages_concurrency
         assert videos_concurrency and pages_concurrency
 
-        async for video in self.iterator(target_page_urls=page_urls, video_link_extractor=extractor_account,
-                                         max_video_concurrency=videos_concurrency,
-                                         max_page_concurrency=pages_concurrency,
-                                         page_request_method="POST"):
-
-            yield await video.init()
+        async for video in iterate_videos(self, fields, target_page_urls=page_urls,
+                                          video_link_extractor=extractor_account,
+                                          max_video_concurrency=videos_concurrency,
+                                          max_page_concurrency=pages_concurrency,
+                                          page_request_method="POST"):
+            yield video
 
     async def get_liked_videos(self, pages: int = 2, videos_concurrency: int | None = None,
-                                     pages_concurrency: int | None = None) -> AsyncGenerator['Video', None]:
+                                     pages_concurrency: int | None = None,
+                                     fields: list[str] | None = None) -> AsyncGenerator['Video', None]:
 
         page_urls = [f"https://www.xvideos.com/videos-i-like/{page}" for page in range(pages)]
         videos_concurrency = videos_concurrency or self.core.configuration.videos_concurrency
         pages_concurrency = pages_concurrency or self.core.configuration.pages_concurrency
         assert videos_concurrency and pages_concurrency
-        async for video in self.iterator(target_page_urls=page_urls, video_link_extractor=extractor_account,
-                                         max_video_concurrency=videos_concurrency,
-                                         max_page_concurrency=pages_concurrency,
-                                         page_request_method="POST"):
-
-            yield await video.init()
+        async for video in iterate_videos(self, fields, target_page_urls=page_urls,
+                                          video_link_extractor=extractor_account,
+                                          max_video_concurrency=videos_concurrency,
+                                          max_page_concurrency=pages_concurrency,
+                                          page_request_method="POST"):
+            yield video
     async def get_watch_later_videos(self, pages: int = 2, videos_concurrency: int | None = None,
-                                     pages_concurrency: int | None = None) -> AsyncGenerator['Video', None]:
+                                     pages_concurrency: int | None = None,
+                                     fields: list[str] | None = None) -> AsyncGenerator['Video', None]:
 
         page_urls = [f"https://www.xvideos.com/watch-later/{page}" for page in range(pages)]
         videos_concurrency = videos_concurrency or self.core.configuration.videos_concurrency
         pages_concurrency = pages_concurrency or self.core.configuration.pages_concurrency
         assert videos_concurrency and pages_concurrency
-        async for video in self.iterator(target_page_urls=page_urls, video_link_extractor=extractor_account,
-                                         max_video_concurrency=videos_concurrency,
-                                         max_page_concurrency=pages_concurrency,
-                                         page_request_method="POST"):
+        async for video in iterate_videos(self, fields, target_page_urls=page_urls,
+                                          video_link_extractor=extractor_account,
+                                          max_video_concurrency=videos_concurrency,
+                                          max_page_concurrency=pages_concurrency,
+                                          page_request_method="POST"):
+            yield video
+
+
+
+def page_field(function):
+    """
+    cached_property for Video fields that live in the page. Raises IncompletePage instead of computing a wrong value
+    when only a prefix of the page was streamed that doesn't cover the field.
+    """
+    name = function.__name__
 
-            yield await video.init()
+    @wraps(function)
+    def checked(self):
+        self.require_field(name)
+        return function(self)
 
+    return cached_property(checked)
 
 
 class Video:
@@ -153,19 +249,89 @@ class Video:
         self.logger = setup_logger(name="XVIDEOS API - [Video]", log_file=None, level=logging.ERROR)
         self.html_content = html_content
         self._soup = None
-        self.json_data = {}
+        self._json_data = None
         self.quality_url_map = None
         self.available_qualities = None
+        self.stream_markers = None # Markers of the streamed prefix in html_content, None for the complete page
 
-    async def init(self):
-        if not self.html_content:
-            self.html_content = await get_html_content(core=self.core, url=self.url)
+    async def init(self, stream: bool = False, fields: list[str] | None = None):
+        """
+        :param stream: (bool) Only read the page until the JSON-LD, the HLS player script and the ratings were found.
+                              Saves bandwidth, fields further down the page (e.g. tags) raise IncompletePage.
+        :param fields: (list) Only extract these fields, e.g. ["m3u8_base_url"]. The page is streamed automatically
+                              if all of them sit early in the page and the HTML is only parsed if a field needs it.
+                              Fields outside the streamed part raise IncompletePage when accessed, init() again
+                              with the fields (or without any) to fetch the rest of the page.
+        """
+        markers = STREAM_MARKERS_DEFAULT if stream else None
+        if fields is not None:
+            markers = self.plan_markers(fields)
+
+        if not self.html_content or not self.covers(markers):
+            if markers:
+                self.html_content = await stream_html_content(core=self.core, url=self.url, markers=markers)
+
+            else:
+                self.html_content = await get_html_content(core=self.core, url=self.url)
+
+            self.stream_markers = list(markers) if markers else None
+            self._soup = None # A soup of the prefix would miss everything after it
+            self._json_data = None
 
         assert isinstance(self.html_content, str)
-        self._soup = BeautifulSoup(self.html_content, parser)
-        self.json_data = self.meta
+        if fields is None:
+            self._json_data = self.meta
+            if self.stream_markers is None:
+                self._soup = self._soup or BeautifulSoup(self.html_content, parser)
+                local_index = getattr(self.core, "local_index", None) # Set by Client(local_index=...)
+                if local_index is not None:
+                    local_index.add_video(self)
+
+        else:
+            for field in fields:
+                getattr(self, field)
+
         return self
 
+    def covers(self, markers: list | None) -> bool:
+        """
+        :param markers: (list) Markers a caller needs, None for the complete page
+        :return: (bool) Whether html_content has everything these markers stand for
+        """
+        if self.stream_markers is None:
+            return True
+
+        return markers is not None and all(marker in self.stream_markers for marker in markers)
+
+    def require_field(self, field: str) -> None:
+        """Raises IncompletePage if `field` isn't covered by the streamed part of the page"""
+        marker = VIDEO_FIELD_MARKERS.get(field)
+        if self.covers(None if marker is None else [marker]):
+            return
+
+        raise IncompletePage(f"'{field}' is not in the streamed part of the page of {self.url}. Pass it in "
+                             f"init(fields=...) or call init() without fields / stream for the complete page.")
+
+    @staticmethod
+    def plan_markers(fields: list[str]) -> list | None:
+        """
+        :param fields: (list) The requested Video fields
+        :return: (list) The stream markers needed for these fields, or None if the whole page is needed
+        """
+        markers = []
+        for field in fields:
+            if field not in VIDEO_FIELD_MARKERS:
+                raise ValueError(f"Unknown video field: {field}")
+
+            marker = VIDEO_FIELD_MARKERS[field]
+            if marker is None:
+                return None
+
+            if marker not in markers:
+                markers.append(marker)
+
+        return markers
+
     def enable_logging(self, log_file: str | None = None, level: int | None = None, log_ip: str | None = None, log_port: int | None = None):
         if not level:
             level = logging.DEBUG
@@ -175,11 +341,21 @@ class Video:
     @property
     def soup(self) -> BeautifulSoup:
         # lxml is much faster than the default parser
-        if not self._soup:
-            raise ValueError("You probably forgot to call init")
+        if self._soup is None:
+            if not self.html_content:
+                raise ValueError("You probably forgot to call init")
+
+            self._soup = BeautifulSoup(self.html_content, parser)
 
         return self._soup
 
+    @property
+    def json_data(self) -> dict:
+        if self._json_data is None:
+            self._json_data = self.meta
+
+        return self._json_data
+
     @cached_property
     def script_content(self) -> str:
         # Find the one script we care about without reparsing
@@ -207,11 +383,18 @@ class Video:
 
     def _get_json_data(self) -> dict:
         data = {}
-        for s in self.soup.select('script[type="application/ld+json"]'):
-            if not s.string:
+        if self._soup is None:
+            # Don't build the whole soup just for the JSON-LD
+            scripts = REGEX_JSON_LD.findall(self.html_content or "")
+
+        else:
+            scripts = [s.string for s in self.soup.select('script[type="application/ld+json"]')]
+
+        for script in scripts:
+            if not script:
                 continue
             try:
-                data.update(json.loads(s.string))
+                data.update(json.loads(script))
             except Exception:
                 continue
         return data
@@ -240,15 +423,16 @@ class Video:
     async def download(self, quality, path="./", callback: callback_hint = None, no_title=False, remux: bool = False,
                  callback_remux=None, start_segment: int = 0, stop_event: threading.Event | None = None,
                  segment_state_path: str | None = None, segment_dir: str | None = None,
-                 return_report: bool = False, cleanup_on_stop: bool = True, keep_segment_dir: bool = False
-                 ) -> bool | DownloadReport:
+                 return_report: bool = False, cleanup_on_stop: bool = True, keep_segment_dir: bool = False,
+                 store: DownloadStore | None = None) -> bool | DownloadReport:
         """
         :param callback:
         :param quality:
         :param path:
         :param no_title:
-        :param remux:
-        :param callback_remux:
+        :param remux: (bool) Remux the MPEG-TS download to MP4 (needs PyAV)
+        :param callback_remux: (callable) Progress of the remux of this file, called with (done, total). For remuxing
+                               many downloads in a process pool see PostProcessor and its callback_remux
         :param start_segment:
         :param stop_event:
         :param segment_state_path:
@@ -256,11 +440,18 @@ class Video:
         :param return_report:
         :param cleanup_on_stop:
         :param keep_segment_dir:
+        :param store: (DownloadStore) Download into the store (deduplicated by video id + quality, resumable) and
+                      hard-link the result to `path`. segment_state_path / segment_dir are managed by the store.
         :return:
         """
         if not no_title:
             path = os.path.join(path, f"{self.title}.mp4")
 
+        if store is not None:
+            return await store.download(self, quality=quality, path=path, callback=callback, remux=remux,
+                                        callback_remux=callback_remux, stop_event=stop_event,
+                                        return_report=return_report, keep_segment_dir=keep_segment_dir)
+
         try:
             return await self.core.download(video=self, quality=quality, path=path, callback=callback, remux=remux,
                                   callback_remux=callback_remux, start_segment=start_segment, stop_event=stop_event,
@@ -275,39 +466,62 @@ class Video:
             await self.core.legacy_download(path=path, callback=callback, url=self.cdn_url)
             return True
 
-    @cached_property
+    async def download_adaptive(self, path="./", target_time: float | None = None, max_quality="best",
+                                initial_throughput: float | None = None, callback: callback_hint = None,
+                                no_title=False, remux: bool = False, callback_remux=None,
+                                stop_event: threading.Event | None = None) -> AdaptiveDownloadReport:
+        """
+        Downloads the HLS stream and switches to a lower variant when the download would take longer than
+        `target_time` (see AdaptiveDownloader).
+
+        :param path: (str) Output directory, or the file path with no_title=True
+        :param target_time: (float) Seconds the download should take at most, None keeps `max_quality`
+        :param max_quality: (str, int) Highest quality to use
+        :param initial_throughput: (float) Expected bytes per second, picks the first variant from the bandwidths
+        :return: (AdaptiveDownloadReport) The report including the decision log
+        """
+        if not no_title:
+            path = os.path.join(path, f"{self.title}.mp4")
+
+        downloader = AdaptiveDownloader(self.core, target_time=target_time, max_quality=max_quality,
+                                        initial_throughput=initial_throughput)
+        return await downloader.download(self.m3u8_base_url, path, callback=callback, remux=remux,
+                                         callback_remux=callback_remux, stop_event=stop_event)
+
+    @page_field
     def m3u8_base_url(self) -> str:
-        return REGEX_VIDEO_M3U8.search(self.script_content).group(1)
+        # The regex is specific enough to run on the raw page, which avoids parsing the HTML for downloads
+        return REGEX_VIDEO_M3U8.search(self.html_content).group(1)
 
-    @cached_property
+    @page_field
     def title(self) -> str:
-        return html.unescape(self.meta["name"]) if self.meta["name"] else ""
+        return html.unescape(self.json_data["name"]) if self.json_data["name"] else ""
 
-    @cached_property
+    @page_field
     def description(self) -> str:
         return html.unescape(self.json_data["description"])
 
-    @cached_property
+    @page_field
     def thumbnail_url(self) -> str:
         return self.json_data["thumbnailUrl"]
 
-    @cached_property
+    @page_field
     def preview_video_url(self) -> str:
-        thumb = html.unescape(self.json_data["thumbnailUrl"])[0]
-        base_url = re.sub(r'/thumbs(169)?(xnxx)?(l*|poster)/', '/videopreview/', thumb[:thumb.rfind("/")])
-        suffix = re.search(r'-(\d+)', base_url)
-        base_url = re.sub(r'-(\d+)', '', base_url) if suffix else base_url
+        thumb = html.unescape(self.json_data["thumbnailUrl"]) # meta already picked the first thumbnail
+        base_url = REGEX_PREVIEW_THUMBS.sub('/videopreview/', thumb[:thumb.rfind("/")])
+        suffix = REGEX_PREVIEW_SUFFIX.search(base_url)
+        base_url = REGEX_PREVIEW_SUFFIX.sub('', base_url) if suffix else base_url
         return f"{base_url}_169{suffix.group(0) if suffix else ''}.mp4"
 
-    @cached_property
+    @page_field
     def publish_date(self) -> str:
         return html.unescape(self.json_data["uploadDate"])
 
-    @cached_property
+    @page_field
     def content_url(self) -> str:
         return html.unescape(self.json_data["contentUrl"])
 
-    @cached_property
+    @page_field
     def tags(self) -> list:
         a_tags = self.soup.find_all('a', class_="is-keyword btn btn-default")
         tags = []
@@ -316,27 +530,27 @@ class Video:
 
         return tags
 
-    @cached_property
+    @page_field
     def views(self) -> str:
         return self.soup.find('span', class_='icon-f icf-eye').next.text
 
-    @cached_property
+    @page_field
     def likes(self) -> str:
         return self.soup.find('span', class_='rating-good-nbr').text
 
-    @cached_property
+    @page_field
     def dislikes(self) -> str:
         return self.soup.find('span', class_='rating-bad-nbr').text
 
-    @cached_property
+    @page_field
     def rating_votes(self) -> str:
         return self.soup.find('span', class_='rating-total-txt').text
 
-    @cached_property
+    @page_field
     def comment_count(self) -> str:
         return self.soup.find('button', class_="comments tab-button").next.next.text
 
-    @cached_property
+    @page_field
     def author(self):
         """Returns the Channel object where the video was published on"""
         link = self.soup.find("li", class_="main-uploader").find('a')["href"]
@@ -346,28 +560,28 @@ class Video:
         else:
             return Channel(url=f"https://xvideos.com{link}", core=self.core)
 
-    @cached_property
+    @page_field
     def length(self) -> str:
         return self.soup.find('span', class_="duration").text
 
-    @cached_property
-    def pornstars(self):
+    @page_field
+    def pornstars(self) -> list:
         """
         Returns the Pornstar objects for the Pornstars that are featured in the video
+        (a list, so it can be iterated more than once)
         """
         pornstars = self.soup.find_all('li', class_="model")
         urls = []
         for pornstar in pornstars:
             urls.append(f"https://xvideos.com{pornstar.next['href']}")
 
-        for url in urls:
-            yield Pornstar(url=url, core=self.core)
+        return [Pornstar(url=url, core=self.core) for url in urls]
 
-    @cached_property
+    @page_field
     def embed_url(self) -> str:
         return REGEX_IFRAME.search(html.unescape(self.html_content)).group(1)
 
-    @cached_property
+    @page_field
     def cdn_url(self) -> str:
         return self.json_data["contentUrl"]
 
@@ -427,7 +641,8 @@ class Channel(Helper):
     def total_pages(self):
         return math.ceil(self.total_videos / self.per_page)
 
-    async def videos(self, pages: int = 0, videos_concurrency: int | None = None, pages_concurrency: int | None = None) -> AsyncGenerator[Video, None]:
+    async def videos(self, pages: int = 0, videos_concurrency: int | None = None, pages_concurrency: int | None = None,
+                     fields: list[str] | None = None) -> AsyncGenerator[Video, None]:
         if pages > self.total_pages:
             self.logger.warning(f"You want to fetch: {self.total_pages} pages but only: {self.total_pages} are available. Reducing!")
             pages = self.total_pages
@@ -440,11 +655,11 @@ class Channel(Helper):
         videos_concurrency = videos_concurrency or self.core.configuration.videos_concurrency
         pages_concurrency = pages_concurrency or self.core.configuration.pages_concurrency
         assert videos_concurrency and pages_concurrency
-        async for video in self.iterator(target_page_urls=page_urls, video_link_extractor=extractor_account,
-                                         max_video_concurrency=videos_concurrency,
-                                         max_page_concurrency=pages_concurrency):
-
-            yield await video.init()
+        async for video in iterate_videos(self, fields, target_page_urls=page_urls,
+                                          video_link_extractor=extractor_account,
+                                          max_video_concurrency=videos_concurrency,
+                                          max_page_concurrency=pages_concurrency):
+            yield video
 
     @cached_property
     def country(self) -> str:
@@ -475,15 +690,19 @@ class Channel(Helper):
         return self.bs4_about_me.find(id="pinfo-lastactivity").span.text.strip()
 
     @cached_property
-    def worked_for_with(self):
+    def worked_for_with(self) -> list:
+        """Returns the channels this channel has worked with as Channel objects"""
         names = self.bs4_about_me.find(id="pinfo-workedfor").find_all('a')
         links = [a['href'] for a in names]
+        channels = []
         for link in links:
             if not "profile" in link:
-                return Channel(url=f"https://xvideos.com/channels{link}", core=self.core)
+                channels.append(Channel(url=f"https://xvideos.com/channels{link}", core=self.core))
 
             else:
-                return Channel(url=f"https://xvideos.com{link}", core=self.core)
+                channels.append(Channel(url=f"https://xvideos.com{link}", core=self.core))
+
+        return channels
 
 
 class Pornstar(Helper):
@@ -539,7 +758,8 @@ class Pornstar(Helper):
     def total_pages(self):
         return math.ceil(self.total_videos / self.per_page)
 
-    async def videos(self, pages: int = 0, videos_concurrency: int | None = None, pages_concurrency: int | None = None) -> AsyncGenerator[Video, None]:
+    async def videos(self, pages: int = 0, videos_concurrency: int | None = None, pages_concurrency: int | None = None,
+                     fields: list[str] | None = None) -> AsyncGenerator[Video, None]:
         if pages > self.total_pages:
             self.logger.warning(
                 f"You want to fetch: {self.total_pages} pages but only: {self.total_pages} are available. Reducing!")
@@ -554,11 +774,11 @@ class Pornstar(Helper):
         pages_concurrency = pages_concurrency or self.core.configuration.pages_concurrency
         assert videos_concurrency and pages_concurrency
 
-        async for video in self.iterator(target_page_urls=page_urls, video_link_extractor=extractor_account,
-                                         max_video_concurrency=videos_concurrency,
-                                         max_page_concurrency=pages_concurrency):
-
-            yield await video.init()
+        async for video in iterate_videos(self, fields, target_page_urls=page_urls,
+                                          video_link_extractor=extractor_account,
+                                          max_video_concurrency=videos_concurrency,
+                                          max_page_concurrency=pages_concurrency):
+            yield video
 
 
     @cached_property
@@ -610,20 +830,38 @@ class Pornstar(Helper):
         return self.bs4_about_me.find(id="pinfo-video-tags").span.text.strip()
 
     @cached_property
-    def worked_for_with(self) -> Generator[Channel, None, None]:
+    def worked_for_with(self) -> list[Channel]:
         """
-        Returns the channels the pornstar has worked with as a Channel object (Generator)
+        Returns the channels the pornstar has worked with as Channel objects (a list, so it can be reused)
         """
         names = self.bs4_about_me.find(id="pinfo-workedfor").find_all('a')
         links = [a['href'] for a in names]
-        for link in links:
-            yield Channel(core=self.core, url=f"https://www.xvideos.com{link}")
+        return [Channel(core=self.core, url=f"https://www.xvideos.com{link}") for link in links]
 
 
 class Client(Helper):
-    def __init__(self, core: BaseCore = BaseCore()):
+    def __init__(self, core: BaseCore | None = None, resilience: ResiliencePolicy | None = None,
+                 local_index: LocalIndex | None = None, rate_limiter: HostRateLimiter | None = None):
+        """
+        :param core: (BaseCore) The network core, a new one per client by default. See SharedTransport for sharing
+                                one session between clients
+        :param resilience: (ResiliencePolicy) Retry / hedging / circuit breaker policy for every request of the core
+        :param local_index: (LocalIndex) Every fully initialized video gets added to this index
+        :param rate_limiter: (HostRateLimiter) Request rate shared with all processes on this host
+        """
+        # Every client gets its own core, rate limiters and policies installed on it must not leak into other clients
+        core = core if core is not None else BaseCore()
         super().__init__(core, video_constructor=Video)
         self.core = core
+        if local_index is not None:
+            self.core.local_index = local_index
+
+        if rate_limiter is not None: # Before the policy, so every retry takes its own token
+            rate_limiter.install(self.core)
+
+        if resilience is not None:
+            resilience.install(self.core)
+
         self.core.initialize_session()
         self.logger = setup_logger(name="XVIDEOS API - [Client]", log_file=None, level=logging.ERROR)
 
@@ -633,21 +871,24 @@ class Client(Helper):
             level = logging.DEBUG
         self.logger = setup_logger(name="XVIDEOS API - [Client]", log_file=log_file, level=level, http_ip=log_ip, http_port=log_port)
 
-    async def get_video(self, url: str) -> Video:
+    async def get_video(self, url: str, stream: bool = False, fields: list[str] | None = None) -> Video:
         """
         :param url: (str) The video URL
+        :param stream: (bool) Stop reading the page once the core metadata was found (see Video.init)
+        :param fields: (list) Only extract these fields (see Video.init)
         :return: (Video) The video object
         """
         video = Video(url, core=self.core)
-        return await video.init()
-
-    async def search(self, query: str, sorting_sort: str | Sort = Sort.Sort_relevance,
-               sorting_date: str | SortDate = SortDate.Sort_all,
-               sorting_time: str | SortVideoTime = SortVideoTime.Sort_all,
-               sort_quality: str | SortQuality = SortQuality.Sort_all,
-               pages: int = 2, videos_concurrency: int | None = None,
-               pages_concurrency: int | None = None) -> AsyncGenerator[Video, None]:
+        return await video.init(stream=stream, fields=fields)
 
+    @staticmethod
+    def search_page_urls(query: str, sorting_sort: str | Sort = Sort.Sort_relevance,
+                         sorting_date: str | SortDate = SortDate.Sort_all,
+                         sorting_time: str | SortVideoTime = SortVideoTime.Sort_all,
+                         sort_quality: str | SortQuality = SortQuality.Sort_all, pages: int = 2) -> list[str]:
+        """
+        :return: (list) The listing page URLs a search with these filters walks through
+        """
         query = query.replace(" ", "+")
         p = urlparse(f"https://www.xvideos.com/")
         qs = parse_qs(p.query)
@@ -665,28 +906,55 @@ class Client(Helper):
 
         new_query = urlencode(qs, doseq=True)
         url = urlunparse(p._replace(query=new_query))
-        page_urls = [f"{url}&p={p}" for p in range(pages)]
+        return [f"{url}&p={p}" for p in range(pages)]
+
+    async def search(self, query: str, sorting_sort: str | Sort = Sort.Sort_relevance,
+               sorting_date: str | SortDate = SortDate.Sort_all,
+               sorting_time: str | SortVideoTime = SortVideoTime.Sort_all,
+               sort_quality: str | SortQuality = SortQuality.Sort_all,
+               pages: int = 2, videos_concurrency: int | None = None,
+               pages_concurrency: int | None = None,
+               fields: list[str] | None = None) -> AsyncGenerator[Video, None]:
+
+        page_urls = self.search_page_urls(query, sorting_sort=sorting_sort, sorting_date=sorting_date,
+                                          sorting_time=sorting_time, sort_quality=sort_quality, pages=pages)
         videos_concurrency = videos_concurrency or self.core.configuration.videos_concurrency
         pages_concurrency = pages_concurrency or self.core.configuration.pages_concurrency
         assert videos_concurrency and pages_concurrency
-        async for video in self.iterator(target_page_urls=page_urls, video_link_extractor=extractor_account,
-                                         max_video_concurrency=videos_concurrency,
-                                         max_page_concurrency=pages_concurrency):
+        async for video in iterate_videos(self, fields, target_page_urls=page_urls,
+                                          video_link_extractor=extractor_account,
+                                          max_video_concurrency=videos_concurrency,
+                                          max_page_concurrency=pages_concurrency):
+            yield video
+
+    def search_local(self, query: str, sorting_sort: str | Sort = Sort.Sort_relevance,
+                     sorting_date: str | SortDate = SortDate.Sort_all,
+                     sorting_time: str | SortVideoTime = SortVideoTime.Sort_all, limit: int = 50) -> list[dict]:
+        """
+        Searches the local index (see Client(local_index=...)) without any network request. There is no quality
+        filter, the resolution of a video isn't known without fetching its playlist.
+        :return: (list) Metadata dicts of the matching videos
+        """
+        local_index = getattr(self.core, "local_index", None)
+        if local_index is None:
+            raise ValueError("No local index configured, use Client(local_index=LocalIndex(...))")
 
-            yield await video.init()
+        return local_index.search_local(query, sorting_sort=sorting_sort, sorting_date=sorting_date,
+                                        sorting_time=sorting_time, limit=limit)
 
     async def get_playlist(self, url: str, pages: int = 2, videos_concurrency: int | None = None,
-                     pages_concurrency: int | None = None) -> AsyncGenerator[Video, None]:
+                     pages_concurrency: int | None = None,
+                     fields: list[str] | None = None) -> AsyncGenerator[Video, None]:
         page_urls = [f"{url}/{page}" for page in range(pages)]
         videos_concurrency = videos_concurrency or self.core.configuration.videos_concurrency
         pages_concurrency = pages_concurrency or self.core.configuration.pages_concurrency
         assert videos_concurrency and pages_concurrency
 
-        async for video in self.iterator(target_page_urls=page_urls, video_link_extractor=extractor_account,
-                                         max_video_concurrency=videos_concurrency,
-                                         max_page_concurrency=pages_concurrency):
-
-            yield await video.init()
+        async for video in iterate_videos(self, fields, target_page_urls=page_urls,
+                                          video_link_extractor=extractor_account,
+                                          max_video_concurrency=videos_concurrency,
+                                          max_page_concurrency=pages_concurrency):
+            yield video
 
     async def get_pornstar(self, url) -> Pornstar:
         pornstar = Pornstar(core=self.core, url=url)
@@ -696,7 +964,14 @@ class Client(Helper):
         channel = Channel(url, core=self.core)
         return await channel.init()
 
-    def get_account(self) -> Account:
+    def get_account(self, cookies: dict | None = None) -> Account:
+        """
+        :param cookies: (dict) Login cookies for this account, falls back to consts.cookies
+        :return: (Account) The account object
+        """
+        if cookies:
+            return Account(core=self.core, cookies=cookies)
+
         account = Account(core=self.core)
         return account
 